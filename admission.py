@@ -0,0 +1,203 @@
+"""
+Sentiment Analysis Tool - Admission Control
+Concurrency limits with bounded wait queues per route group, and per-client token-bucket rate limits
+"""
+
+import math
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from sqlite_store import SQLiteFile
+
+
+class Rejected(Exception):
+    """The request should be turned away with the given status and Retry-After seconds"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class ConcurrencyLimiter:
+    """
+    Lets max_concurrent requests run at once and up to max_queue more wait for a slot
+    Anything beyond that, or waiting longer than queue_timeout, is rejected with 503 right away
+    """
+
+    def __init__(self, max_concurrent, max_queue=0, queue_timeout=1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Take a slot or raise Rejected"""
+        with self._condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise Rejected(503, 'queue_full', self.queue_timeout)
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected(503, 'queue_timeout', self.queue_timeout)
+                    self._condition.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue
+        }
+
+
+class MemoryTokenBuckets:
+    """Per-client token buckets held in this process, forgetting the least recently seen clients past maxsize"""
+
+    def __init__(self, rate, burst, maxsize=10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """
+        Spend one token for key
+        Returns 0 when allowed, otherwise the seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteTokenBuckets:
+    """Per-client token buckets in a local SQLite file, so every worker on the host shares one budget per client"""
+
+    def __init__(self, rate, burst, path):
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        # Rate-limit state is cheap to lose, so commits skip the fsync
+        self._db = SQLiteFile(path, schema=(
+            'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)',
+        ), autocommit=True, synchronous='OFF')
+
+    def take(self, key):
+        now = time.time()
+        conn = self._db.connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)', (key, tokens, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            # Fail open: a broken rate-limit store must not take the API down
+            logging.error(f"Rate limit store failed: {e}")
+            return 0.0
+        return wait
+
+
+class AdmissionController:
+    """Maps endpoints to route groups and applies each group's rate limit and concurrency limit"""
+
+    def __init__(self, groups, endpoint_groups, buckets=None):
+        self.groups = groups  # group name -> ConcurrencyLimiter
+        self.endpoint_groups = endpoint_groups  # endpoint -> group name
+        self.buckets = buckets
+
+    def admit(self, endpoint, client):
+        """
+        Admit a request, returning its group name (or None when the endpoint is not limited)
+        Raises Rejected with 429 when the client is over its rate, 503 when the group is saturated
+        """
+        group = self.endpoint_groups.get(endpoint)
+        if group is None:
+            return None
+        if self.buckets is not None:
+            wait = self.buckets.take(f'{group}:{client}')
+            if wait > 0:
+                raise Rejected(429, 'rate_limited', wait)
+        self.groups[group].acquire()
+        return group
+
+    def release(self, group):
+        self.groups[group].release()
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in self.groups.items()}
+
+
+def queue_age(header, now=None):
+    """
+    Seconds a request spent queued before reaching the app, from an X-Request-Start header set by the proxy
+    Accepts "t=<epoch>" or a bare epoch in seconds, milliseconds or microseconds; returns None if absent or invalid
+    """
+    if not header:
+        return None
+    value = header[2:] if header.startswith('t=') else header
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    while started > 1e11:  # Milliseconds or microseconds
+        started /= 1000
+    return max(0.0, (now or time.time()) - started)
+
+
+TOKEN_BUCKET_STORES = {
+    'memory': MemoryTokenBuckets,
+    'sqlite': SQLiteTokenBuckets,
+}
+
+
+def create_token_buckets(rate, burst=None, store='memory', path=None):
+    """Create per-client token buckets refilling at rate per second, or None when rate limiting is off"""
+    if rate <= 0:
+        return None
+    if store not in TOKEN_BUCKET_STORES:
+        raise ValueError(f"Unknown rate limit store: {store}")
+    burst = burst or max(1.0, rate)
+    if store == 'sqlite':
+        return SQLiteTokenBuckets(rate, burst, path)
+    return MemoryTokenBuckets(rate, burst)
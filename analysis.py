@@ -0,0 +1,231 @@
+"""
+Sentiment Analysis Tool - Core Analysis
+Sentiment scoring shared by the web app and the offline tools
+"""
+
+import os
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+
+from sentiment_engine import get_scorer
+from result_cache import LRUCache, normalize_text
+from metrics import time_stage
+
+# Input limits
+MAX_TEXT_LENGTH = 5000
+
+# Sentiment scoring backend ('lexicon' by default, 'textblob' for the reference implementation)
+score_sentiment = get_scorer(os.environ.get("SENTIMENT_BACKEND"))
+
+# Cache of (polarity, subjectivity) keyed on normalized text; size 0 disables it
+analysis_cache = LRUCache(
+    maxsize=int(os.environ.get("ANALYSIS_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("ANALYSIS_CACHE_TTL", 0))
+)
+
+
+def cached_scores(text):
+    """Return (polarity, subjectivity) for text, from the analysis cache when possible"""
+    cache_key = normalize_text(text)
+    scores = analysis_cache.get(cache_key)
+    if scores is None:
+        with time_stage('scoring'):
+            scores = score_sentiment(text)
+        analysis_cache.set(cache_key, scores)
+    return scores
+
+
+def analyze_sentiment(text, fields=None):
+    """
+    Analyze sentiment using the configured scoring backend
+    Returns polarity, subjectivity, and sentiment classification with additional metrics (only the given fields if set)
+    """
+    return AnalysisResult(text).to_dict(fields)
+
+
+def classify_polarity(polarity):
+    """
+    Classify a polarity score
+    Returns (sentiment, confidence, confidence level)
+    """
+    # Classify sentiment based on polarity
+    if polarity > 0:
+        sentiment = "Positive"
+    elif polarity < 0:
+        sentiment = "Negative"
+    else:
+        sentiment = "Neutral"
+    
+    # Calculate confidence level
+    confidence = abs(polarity)
+    if confidence > 0.7:
+        confidence_level = "Very High"
+    elif confidence > 0.3:
+        confidence_level = "High"
+    elif confidence > 0.1:
+        confidence_level = "Moderate"
+    else:
+        confidence_level = "Low"
+    
+    return sentiment, confidence, confidence_level
+
+
+# Fields of an analysis result, in output order
+RESULT_FIELDS = ('polarity', 'subjectivity', 'sentiment', 'confidence', 'confidence_level',
+                 'word_count', 'char_count', 'timestamp')
+# Fields that need the text scored, the expensive stage
+SCORE_FIELDS = frozenset(('polarity', 'subjectivity', 'sentiment', 'confidence', 'confidence_level'))
+
+
+class AnalysisResult(Mapping):
+    """
+    Analysis of one text, computed field by field on first access
+    Scoring runs only when a score-derived field is read; word count, char count and timestamp are just as lazy
+    """
+
+    def __init__(self, text, scores=None, timestamp=None):
+        self.text = text
+        self._values = {}
+        if scores is not None:
+            self._values['polarity'], self._values['subjectivity'] = scores
+        if timestamp is not None:
+            self._values['timestamp'] = timestamp
+
+    def __getitem__(self, field):
+        if field not in self._values:
+            if field in SCORE_FIELDS:
+                if 'polarity' not in self._values:
+                    self._values['polarity'], self._values['subjectivity'] = cached_scores(self.text)
+                (self._values['sentiment'], self._values['confidence'],
+                 self._values['confidence_level']) = classify_polarity(self._values['polarity'])
+            elif field == 'word_count':
+                self._values['word_count'] = len(self.text.split())
+            elif field == 'char_count':
+                self._values['char_count'] = len(self.text)
+            elif field == 'timestamp':
+                self._values['timestamp'] = datetime.now().isoformat()
+            else:
+                raise KeyError(field)
+        return self._values[field]
+
+    def __iter__(self):
+        return iter(RESULT_FIELDS)
+
+    def __len__(self):
+        return len(RESULT_FIELDS)
+
+    def to_dict(self, fields=None):
+        """Return the result as a plain dict, computing only the given fields (all of them by default)"""
+        return {field: self[field] for field in (fields or RESULT_FIELDS)}
+
+
+def parse_fields(value):
+    """
+    Parse a fields selector, given as a comma-separated string or a list of names
+    Returns the fields in output order, or None for all of them; raises ValueError for unknown fields
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not all(isinstance(field, str) for field in value):
+        raise ValueError('fields must be a comma-separated string or a list of field names')
+    requested = {field.strip() for field in value if field.strip()}
+    unknown = requested.difference(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(RESULT_FIELDS)})")
+    return tuple(field for field in RESULT_FIELDS if field in requested) or None
+
+
+def validate_text(text):
+    """
+    Validate one item of a bulk request
+    Returns (stripped text, None) or (None, error message)
+    """
+    if not isinstance(text, str):
+        return None, 'Text must be a string'
+    text = text.strip()
+    if not text:
+        return None, 'Empty text provided'
+    if len(text) > MAX_TEXT_LENGTH:
+        return None, f'Text too long (max {MAX_TEXT_LENGTH} characters)'
+    return text, None
+
+
+def analyze_item(text, fields=None):
+    """
+    Validate and analyze one item of a bulk request
+    Returns (analysis, None) on success or (None, error message) so one bad item never aborts the rest
+    """
+    text, error = validate_text(text)
+    if error:
+        return None, error
+    try:
+        return analyze_sentiment(text, fields), None
+    except Exception as e:
+        logging.error(f"Error analyzing bulk item: {e}")
+        return None, 'Internal server error'
+
+
+def analyze_valid_texts(texts, timestamp, fields=None):
+    """
+    Analyze already-validated texts, serving repeats from the analysis cache
+    With fields set, only those are returned and texts are not scored at all unless a score-derived field is requested
+    """
+    if fields is not None and not SCORE_FIELDS.intersection(fields):
+        scores = [None] * len(texts)
+    else:
+        scores = score_texts(texts)
+    return [AnalysisResult(text, text_scores, timestamp).to_dict(fields) for text, text_scores in zip(texts, scores)]
+
+
+def score_uncached(texts):
+    """Score texts without the analysis cache; returns a list of (polarity, subjectivity)"""
+    with time_stage('scoring'):
+        return [score_sentiment(text) for text in texts]
+
+
+def score_texts(texts):
+    """
+    Score texts, serving repeats from the analysis cache
+    Returns a list of (polarity, subjectivity) in input order
+    """
+    keys = [normalize_text(text) for text in texts]
+    scores = [analysis_cache.get(key) for key in keys]
+    misses = [index for index, cached in enumerate(scores) if cached is None]
+    if misses:
+        for index, computed in zip(misses, score_uncached([texts[index] for index in misses])):
+            analysis_cache.set(keys[index], computed)
+            scores[index] = computed
+    return scores
+
+
+def analyze_sentiment_batch(texts, fields=None):
+    """
+    Analyze a list of texts in one pass
+    Returns a list of results in input order; invalid items get an 'error' entry instead of aborting the batch
+    """
+    timestamp = datetime.now().isoformat()
+    results = [None] * len(texts)
+    valid_indexes, valid_texts = [], []
+    for index, text in enumerate(texts):
+        text, error = validate_text(text)
+        if error:
+            results[index] = {'index': index, 'error': error}
+        else:
+            valid_indexes.append(index)
+            valid_texts.append(text)
+
+    try:
+        analyses = analyze_valid_texts(valid_texts, timestamp, fields)
+    except Exception as e:
+        logging.error(f"Error analyzing batch: {e}")
+        analyses = [None] * len(valid_texts)
+
+    for index, analysis in zip(valid_indexes, analyses):
+        if analysis is None:
+            results[index] = {'index': index, 'error': 'Internal server error'}
+        else:
+            results[index] = {'index': index, 'data': analysis}
+    return results
@@ -0,0 +1,194 @@
+"""
+Sentiment Analysis Tool - Async Serving
+ASGI entry point: Flask routes run on a thread pool while AI reviews run as tasks on the server's event loop
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    gunicorn --config gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads running Flask request handlers (routes, templates, history I/O) per worker
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", 64))
+# Reviews queued or running on the event loop per worker; they hold no thread while waiting on the upstream
+ASYNC_REVIEW_QUEUE_SIZE = int(os.environ.get("ASYNC_REVIEW_QUEUE_SIZE", 1000))
+
+# A review request only holds a thread for REVIEW_INLINE_WAIT, so admit as many as there are threads
+os.environ.setdefault("REVIEW_MAX_CONCURRENCY", str(ASGI_THREADS))
+os.environ.setdefault("REVIEW_MAX_QUEUE", str(ASGI_THREADS * 4))
+
+from main import app as flask_app, review_jobs, upstream_client
+
+
+class RequestBody:
+    """Blocking file-like view of an ASGI request body, read from a handler thread"""
+
+    def __init__(self, receive, call):
+        self._receive = receive
+        self._call = call  # Runs a coroutine on the event loop and returns its result
+        self._buffer = b''
+        self._more = True
+
+    def _fill(self):
+        """Pull the next body message; returns False at the end of the body"""
+        if not self._more:
+            return False
+        message = self._call(self._receive())
+        if message['type'] == 'http.disconnect':
+            self._more = False
+            return False
+        self._buffer += message.get('body', b'')
+        self._more = message.get('more_body', False)
+        return True
+
+    def read(self, size=-1):
+        while (size is None or size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        while b'\n' not in self._buffer and (size is None or size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        data, self._buffer = self._buffer[:end], self._buffer[end:]
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ"""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,  # The body reader signals its own end, so chunked uploads work
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class AsyncServer:
+    """
+    ASGI application serving a WSGI app from a thread pool
+    Streaming responses are sent chunk by chunk as the WSGI iterator produces them
+    """
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+        self.loop = None
+
+    def start(self):
+        """Attach background review jobs to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            review_jobs.use_event_loop(loop, max_pending=ASYNC_REVIEW_QUEUE_SIZE)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return  # WebSockets are not served; the server closes the connection
+        self.start()
+        await self.loop.run_in_executor(self.executor, self.handle, scope, receive, send, self.loop)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await upstream_client.aclose()
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def handle(self, scope, receive, send, loop):
+        """Run one request through the WSGI app (on a pool thread) and send its response"""
+        def call(coroutine):
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return lambda data: None  # The legacy write() callable is not supported
+
+        def start():
+            call(send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']}))
+
+        body = self.wsgi_app(build_environ(scope, RequestBody(receive, call)), start_response)
+        try:
+            if isinstance(body, (list, tuple)):
+                # A buffered response goes out in one message
+                start()
+                call(send({'type': 'http.response.body', 'body': b''.join(body)}))
+                return
+            started = False
+            for chunk in body:
+                if not chunk:
+                    continue
+                if not started:
+                    start()
+                    started = True
+                call(send({'type': 'http.response.body', 'body': chunk, 'more_body': True}))
+            if not started:
+                start()
+            call(send({'type': 'http.response.body', 'body': b''}))
+        except OSError as e:
+            logging.info(f"Client went away during response: {e}")
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+
+app = AsyncServer(flask_app)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Benchmark Suite
+Times scoring, the API, history rendering and the fallback rewrite path, and compares runs against a JSON baseline
+
+Usage:
+    python benchmark.py --save baseline.json          # record a baseline
+    python benchmark.py --compare baseline.json       # exit 1 if any benchmark is slower than the threshold
+    python benchmark.py --filter score --quick
+
+Benchmarks run in-process against the Flask test client with the memory history store and no AI key,
+so results reflect this code rather than the network or database.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Isolate the app from local state before it is imported
+os.environ.setdefault('HISTORY_STORE', 'memory')
+os.environ.setdefault('IMPROVEMENT_CACHE_SIZE', '0')
+os.environ.pop('DEEPSEEK_API_KEY', None)
+os.environ.pop('PROFILE_SECRET', None)
+
+WORDS = (
+    "the service was good bad great awful fine terrible lovely slow quick helpful rude friendly "
+    "product support team delivery price quality really very not never always happy sad disappointed "
+    "excellent poor amazing boring clean dirty cheap expensive"
+).split()
+
+TEXT_SIZES = {'short': 60, 'medium': 600, 'long': 5000}
+HISTORY_LENGTHS = (10, 100, 1000)
+DEFAULT_THRESHOLD = 0.15
+
+
+def make_text(chars, rng):
+    """Build a sentence-like text of about chars characters"""
+    words, length = [], 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.08:
+            words[-1] += '.'
+    return ' '.join(words)[:chars].strip()
+
+
+def measure(fn, number, repeat):
+    """Run fn number times per round for repeat rounds; return per-call seconds for each round"""
+    fn()  # Warm-up
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return rounds
+
+
+def build_benchmarks(quick):
+    """Return {name: (fn, calls per round, items per call)}"""
+    import main
+    from analysis import analysis_cache, analyze_sentiment, analyze_sentiment_batch
+    from history_store import MemoryHistoryStore
+
+    rng = random.Random(42)
+    scale = 0.2 if quick else 1.0
+    benchmarks = {}
+
+    # Scoring without the cache, so every call does the full work
+    analysis_cache.maxsize = 0
+    for size, chars in TEXT_SIZES.items():
+        text = make_text(chars, rng)
+        benchmarks[f'score_single[{size}]'] = (lambda text=text: analyze_sentiment(text), max(1, int(200 * scale * 600 / chars)), 1)
+
+        texts = [make_text(chars, rng) for _ in range(max(10, int(500 * scale * 60 / chars)))]
+        benchmarks[f'score_batch[{size}]'] = (lambda texts=texts: analyze_sentiment_batch(texts), 1, len(texts))
+
+    client = main.app.test_client()
+    api_texts = [make_text(TEXT_SIZES['medium'], rng) for _ in range(50)]
+    api_cycle = iter(range(10 ** 9))
+    benchmarks['api_analyze[medium]'] = (
+        lambda: client.post('/api/analyze', json={'text': api_texts[next(api_cycle) % len(api_texts)]}),
+        max(1, int(100 * scale)), 1
+    )
+
+    # /history rendering as the history grows (one page is rendered, so this should stay flat)
+    store = MemoryHistoryStore()
+    original_store = main.history_store
+    for length in HISTORY_LENGTHS:
+        history_id = f'benchmark-{length}'
+        for index in range(length):
+            text = make_text(TEXT_SIZES['short'], rng)
+            analysis = analyze_sentiment(text)
+            store.add(history_id, dict(text=text, **{k: analysis[k] for k in ('polarity', 'subjectivity', 'sentiment', 'word_count', 'char_count')}))
+
+        def render_history(history_id=history_id):
+            main.history_store = store
+            try:
+                with client.session_transaction() as session:
+                    session['history_id'] = history_id
+                return client.get('/history')
+            finally:
+                main.history_store = original_store
+        benchmarks[f'history_render[{length}]'] = (render_history, max(1, int(50 * scale)), 1)
+
+    negative = "This is terrible, the support was awful and I hate how useless and stupid the app is."
+    benchmarks['improve_fallback'] = (lambda: main.improve_sentiment_fallback(negative), max(1, int(500 * scale)), 1)
+    return benchmarks
+
+
+def run(quick=False, name_filter=None, repeat=5):
+    """Run the benchmarks and return the results document"""
+    results = {}
+    for name, (fn, number, items) in build_benchmarks(quick).items():
+        if name_filter and name_filter not in name:
+            continue
+        rounds = measure(fn, number, repeat)
+        median = statistics.median(rounds)
+        results[name] = {
+            'median': median,
+            'min': min(rounds),
+            'items_per_second': items / median if median else None,
+            'calls': number * repeat
+        }
+        print(f"{name:<28}{median * 1000:>11.3f} ms{items / median:>14.0f} items/s", file=sys.stderr)
+    return {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': os.environ.get('SENTIMENT_BACKEND', 'lexicon'),
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare medians with a baseline document
+    Returns (rows, regressions) where each row is (name, baseline seconds, current seconds, relative change)
+    """
+    rows, regressions = [], []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = result['median'] / base['median'] - 1
+        rows.append((name, base['median'], result['median'], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scoring, the API, history rendering and the fallback path')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a JSON baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5, help='timing rounds per benchmark (default: 5)')
+    parser.add_argument('--quick', action='store_true', help='fewer calls per round, for a fast sanity run')
+    args = parser.parse_args()
+
+    current = run(args.quick, args.filter, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(current, baseline, args.threshold)
+        print(f"\n{'benchmark':<28}{'baseline':>12}{'current':>12}{'change':>10}")
+        for name, base, now, change in rows:
+            flag = '  ❌' if name in regressions else ''
+            print(f"{name:<28}{base * 1000:>10.3f}ms{now * 1000:>10.3f}ms{change:>+10.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
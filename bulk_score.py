@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Offline Bulk Scorer
+Scores large CSV or JSONL files across all cores and writes JSONL results
+
+Usage:
+    python bulk_score.py comments.jsonl -o scores.jsonl --field text
+    python bulk_score.py comments.csv -o scores.jsonl --field body --id-field comment_id
+    python bulk_score.py comments.jsonl -o scores.jsonl --resume
+
+Records must be one per line (CSV fields with embedded newlines are not supported).
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from analysis import analyze_sentiment_batch
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def find_chunks(data, start, chunk_size):
+    """Split data[start:] into (start, end) byte ranges that end on line boundaries"""
+    chunks = []
+    size = len(data)
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = data.find(b'\n', end - 1)
+            end = size if newline == -1 else newline + 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def parse_record(line, fmt, field, id_field, columns):
+    """Return (text, record id) for one input line"""
+    if fmt == 'csv':
+        row = next(csv.reader([line]))
+        record = dict(zip(columns, row))
+    else:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            return record, None
+    return record.get(field), record.get(id_field) if id_field else None
+
+
+def score_chunk(task):
+    """Score every line in one byte range of the input file (runs in a worker process)"""
+    path, start, end, fmt, field, id_field, columns = task
+    records = []
+    texts = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = start
+        while offset < end:
+            newline = data.find(b'\n', offset, end)
+            line_end = end if newline == -1 else newline + 1
+            line = data[offset:line_end].decode('utf-8', errors='replace').rstrip('\r\n')
+            if line.strip():
+                record = {'offset': offset}
+                try:
+                    text, record_id = parse_record(line, fmt, field, id_field, columns)
+                except (ValueError, StopIteration):
+                    record['error'] = 'Invalid record'
+                else:
+                    if record_id is not None:
+                        record['id'] = record_id
+                    texts.append(text)
+                records.append(record)
+            offset = line_end
+
+    # Score the whole chunk in one batch
+    results = iter(analyze_sentiment_batch(texts))
+    output = []
+    errors = 0
+    for record in records:
+        if 'error' not in record:
+            result = next(results)
+            if 'error' in result:
+                record['error'] = result['error']
+            else:
+                record['data'] = result['data']
+        if 'error' in record:
+            errors += 1
+        output.append(json.dumps(record))
+    text = '\n'.join(output) + '\n' if output else ''
+    return start, end, text, len(output), errors
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """Atomically write the checkpoint file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def report(records, errors, bytes_done, total_bytes, started, final=False):
+    """Print throughput to stderr"""
+    elapsed = max(time.monotonic() - started, 1e-9)
+    percent = 100.0 * bytes_done / total_bytes if total_bytes else 100.0
+    print(
+        f"{'✅' if final else '⏳'} {records:,} records ({errors:,} errors) | "
+        f"{percent:5.1f}% | {records / elapsed:,.0f} records/s | "
+        f"{bytes_done / elapsed / 1024 / 1024:,.1f} MB/s",
+        file=sys.stderr
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Score a CSV or JSONL file offline and write JSONL results')
+    parser.add_argument('input', help='Input .csv or .jsonl file (one record per line)')
+    parser.add_argument('-o', '--output', required=True, help='Output JSONL file')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from file extension)')
+    parser.add_argument('--field', default='text', help='CSV column or JSON field holding the text (default: text)')
+    parser.add_argument('--id-field', help='CSV column or JSON field copied to the output as "id"')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Bytes per work unit')
+    parser.add_argument('--unordered', action='store_true', help='Write chunks as they finish instead of in input order')
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint of a previous run')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--progress-interval', type=float, default=2.0, help='Seconds between throughput reports')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the bulk scorer"""
+    args = parse_args(argv)
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+
+    total_bytes = os.path.getsize(args.input)
+    if total_bytes == 0:
+        open(args.output, 'w').close()
+        return
+
+    with open(args.input, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        columns = None
+        data_start = 0
+        if fmt == 'csv':
+            header_end = data.find(b'\n')
+            header_end = len(data) if header_end == -1 else header_end + 1
+            columns = next(csv.reader([data[:header_end].decode('utf-8-sig').rstrip('\r\n')]))
+            data_start = header_end
+
+        checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+        if checkpoint:
+            chunk_size = checkpoint['chunk_size']
+            done = set(map(tuple, checkpoint['done']))
+            print(f"↩️  Resuming from offset {checkpoint['offset']:,}", file=sys.stderr)
+        else:
+            chunk_size = args.chunk_size
+            done = set()
+            checkpoint = {
+                'input': os.path.abspath(args.input),
+                'chunk_size': chunk_size,
+                'offset': data_start,
+                'done': [],
+                'output_bytes': 0
+            }
+        chunks = [c for c in find_chunks(data, data_start, chunk_size) if c[1] > checkpoint['offset'] and c not in done]
+
+    tasks = [(args.input, start, end, fmt, args.field, args.id_field, columns) for start, end in chunks]
+    records = errors = 0
+    bytes_done = checkpoint['offset'] + sum(end - start for start, end in done)
+    started = last_report = time.monotonic()
+
+    # Drop output written after the last checkpoint so resumed runs never duplicate records
+    with open(args.output, 'ab') as out:
+        out.truncate(checkpoint['output_bytes'])
+
+    with open(args.output, 'a', encoding='utf-8') as out, Pool(args.workers) as pool:
+        results = pool.imap_unordered(score_chunk, tasks) if args.unordered else pool.imap(score_chunk, tasks)
+        for start, end, text, count, chunk_errors in results:
+            out.write(text)
+            out.flush()
+
+            # Advance the checkpoint past every contiguous finished chunk
+            done.add((start, end))
+            while True:
+                following = next((c for c in done if c[0] == checkpoint['offset']), None)
+                if following is None:
+                    break
+                done.discard(following)
+                checkpoint['offset'] = following[1]
+            checkpoint['done'] = sorted(done)
+            checkpoint['output_bytes'] = out.tell()
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            records += count
+            errors += chunk_errors
+            bytes_done += end - start
+            if time.monotonic() - last_report >= args.progress_interval:
+                report(records, errors, bytes_done, total_bytes, started)
+                last_report = time.monotonic()
+
+    report(records, errors, bytes_done, total_bytes, started, final=True)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,30 @@ def create_deployment_package():
     # Define files to include in the package
     files_to_include = [
         'main.py',
+        'analysis.py',
+        'bulk_score.py',
+        'benchmark.py',
+        'load_test.py',
+        'stub_llm.py',
+        'sentiment_engine.py',
+        'result_cache.py',
+        'history_store.py',
+        'long_document.py',
+        'live_analysis.py',
+        'upstream_client.py',
+        'improvement_cache.py',
+        'sqlite_store.py',
+        'review_jobs.py',
+        'singleflight.py',
+        'rewrite_rules.py',
+        'rewrite_rules.json',
+        'metrics.py',
+        'profiling.py',
+        'admission.py',
+        'serialization.py',
+        'warmup.py',
+        'gunicorn.conf.py',
+        'asgi.py',
         'run.py',
         'install.py',
         'run.sh',
@@ -0,0 +1,55 @@
+"""
+Sentiment Analysis Tool - Gunicorn Configuration
+Preloads and warms the app in the master so forked workers share its memory copy-on-write, and runs threaded
+workers whose admission limits are sized to their threads
+"""
+
+import os
+import tempfile
+
+# Workers share metrics snapshots through a directory; set it before the app (and its registry) is imported
+os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), f"sentiment-metrics-{os.environ.get('PORT', '5000')}")
+)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Threaded workers, so each has several requests in the app at once for admission control to limit and shed;
+# a sync worker only ever runs one, and a burst waits in the socket backlog where no limit can see it
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+from gunicorn.workers.gthread import ThreadWorker
+
+from metrics import registry
+from warmup import freeze
+
+# Each route group may hold 1/n of the threads running and as many queued; streams hold theirs for a whole upload
+THREAD_SHARES = {'scoring': 4, 'review': 4, 'streaming': 8}
+
+# Import main (and run its warm-up) once in the master instead of once per worker
+preload_app = True
+
+
+def on_starting(server):
+    """Drop snapshots left by a previous run so they are not summed into this one, and size limits to the threads"""
+    registry.clear()
+    # Runs after the command line is applied, so a -k (e.g. uvicorn workers for asgi:app) or --threads is seen here
+    if issubclass(server.worker_class, ThreadWorker):
+        size_admission_limits(server.cfg.threads)
+
+
+def size_admission_limits(threads):
+    """
+    Cap each route group at a share of a gthread worker's threads (running plus queued), unless its limits are set
+    explicitly: a burst beyond that gets fast 503s while threads stay free for the other groups and everything else
+    """
+    from main import admission  # Already imported by preload_app
+
+    for group, limiter in admission.groups.items():
+        limit = max(threads // THREAD_SHARES.get(group, 4), 1)
+        if f'{group.upper()}_MAX_CONCURRENCY' not in os.environ:
+            limiter.max_concurrent = limit
+        if f'{group.upper()}_MAX_QUEUE' not in os.environ:
+            limiter.max_queue = limit
@@ -0,0 +1,503 @@
+"""
+Sentiment Analysis Tool - Server-Side Comment History
+Pluggable history stores keyed by an opaque per-session history ID
+"""
+
+import atexit
+import os
+import threading
+import logging
+from datetime import datetime, timedelta
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SENTIMENTS = ('Positive', 'Negative', 'Neutral')
+
+db = SQLAlchemy()
+
+
+class Comment(db.Model):
+    """A single analyzed comment belonging to one history"""
+    __tablename__ = 'comment_history'
+
+    id = db.Column(db.Integer, primary_key=True)
+    history_id = db.Column(db.String(36), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    polarity = db.Column(db.Float, nullable=False)
+    subjectivity = db.Column(db.Float, nullable=False)
+    sentiment = db.Column(db.String(16), nullable=False)
+    word_count = db.Column(db.Integer, nullable=False)
+    char_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_comment_history_history_id_id', 'history_id', 'id'),
+        db.Index('ix_comment_history_history_id_sentiment', 'history_id', 'sentiment'),
+        # Never reuse the id of a deleted comment: reviews are looked up by (history ID, comment ID)
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'text': self.text,
+            'polarity': self.polarity,
+            'subjectivity': self.subjectivity,
+            'sentiment': self.sentiment,
+            'word_count': self.word_count,
+            'char_count': self.char_count,
+            'timestamp': self.created_at.strftime(TIMESTAMP_FORMAT)
+        }
+
+
+class HistoryStats(db.Model):
+    """Running totals for one history, updated with every added comment"""
+    __tablename__ = 'comment_history_stats'
+
+    history_id = db.Column(db.String(36), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    positive = db.Column(db.Integer, nullable=False, default=0)
+    negative = db.Column(db.Integer, nullable=False, default=0)
+    neutral = db.Column(db.Integer, nullable=False, default=0)
+    polarity_sum = db.Column(db.Float, nullable=False, default=0.0)
+    subjectivity_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class SentimentRollup(db.Model):
+    """Totals for one time bucket of one history (or of every history, under GLOBAL_SCOPE)"""
+    __tablename__ = 'comment_history_rollups'
+
+    scope = db.Column(db.String(36), primary_key=True)
+    granularity = db.Column(db.String(8), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    positive = db.Column(db.Integer, nullable=False, default=0)
+    negative = db.Column(db.Integer, nullable=False, default=0)
+    neutral = db.Column(db.Integer, nullable=False, default=0)
+    polarity_sum = db.Column(db.Float, nullable=False, default=0.0)
+    subjectivity_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+# HistoryStats/SentimentRollup column holding each sentiment's count
+SENTIMENT_COLUMNS = {'Positive': 'positive', 'Negative': 'negative', 'Neutral': 'neutral'}
+
+# Rollup scope aggregating every history
+GLOBAL_SCOPE = '*'
+# Seconds a worker batches its global rollup increments before writing them in one transaction
+GLOBAL_ROLLUP_FLUSH_INTERVAL = 1.0
+# Rollup granularities and their bucket lengths
+ROLLUP_GRANULARITIES = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+
+def bucket_start(moment, granularity):
+    """Start of the bucket containing moment"""
+    moment = moment.replace(second=0, microsecond=0)
+    if granularity in ('hour', 'day'):
+        moment = moment.replace(minute=0)
+    if granularity == 'day':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def rollup_buckets(start, end, granularity):
+    """Start times of the buckets overlapping [start, end)"""
+    step = ROLLUP_GRANULARITIES[granularity]
+    bucket = bucket_start(start, granularity)
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    return buckets
+
+
+def build_series(buckets, totals):
+    """
+    Return one summary per bucket, zero-filled where nothing was recorded
+    totals maps bucket start -> (count, {sentiment: count}, polarity sum, subjectivity sum)
+    """
+    empty = (0, dict.fromkeys(SENTIMENTS, 0), 0.0, 0.0)
+    return [dict(bucket=bucket.isoformat(), **build_summary(*totals.get(bucket, empty))) for bucket in buckets]
+
+
+def build_summary(count, sentiment_counts, polarity_sum, subjectivity_sum):
+    """Return the summary dict served for a history"""
+    return {
+        'count': count,
+        'sentiment_counts': sentiment_counts,
+        'mean_polarity': polarity_sum / count if count else 0.0,
+        'mean_subjectivity': subjectivity_sum / count if count else 0.0
+    }
+
+
+class SQLHistoryStore:
+    """History store backed by Flask-SQLAlchemy (SQLite by default)"""
+
+    def __init__(self, app):
+        self.app = app
+        # Global rollup rows are shared by every history, so increments are batched per worker instead of locking
+        # them in each insert: (granularity, bucket) -> [count, {column: count}, polarity sum, subjectivity sum]
+        self._pending_global = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        atexit.register(self._flush_in_context)
+        app.config.setdefault(
+            'SQLALCHEMY_DATABASE_URI',
+            os.environ.get('HISTORY_DATABASE_URL') or os.environ.get('DATABASE_URL') or 'sqlite:///history.db'
+        )
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            # Comments recorded before rollups existed are rolled up once
+            if (db.session.execute(db.select(SentimentRollup.scope).limit(1)).first() is None
+                    and db.session.execute(db.select(Comment.id).limit(1)).first() is not None):
+                self.rebuild_rollups()
+            # Drop pooled connections so workers forked from a preloading master open their own
+            db.engine.dispose()
+
+    def add(self, history_id, entry):
+        """Store an analyzed comment and return it with its assigned id and timestamp"""
+        for attempt in range(2):
+            comment = Comment(
+                history_id=history_id,
+                created_at=datetime.now(),
+                text=entry['text'],
+                polarity=entry['polarity'],
+                subjectivity=entry['subjectivity'],
+                sentiment=entry['sentiment'],
+                word_count=entry['word_count'],
+                char_count=entry['char_count']
+            )
+            db.session.add(comment)
+            self._add_to_stats(history_id, comment)
+            self._add_to_rollups(history_id, comment)
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Another request created a stats or rollup row first; retry, which increments it instead
+                db.session.rollback()
+                if attempt:
+                    raise
+        self._queue_global_rollup(comment)
+        return comment.to_dict()
+
+    def _add_to_stats(self, history_id, comment):
+        """Fold one comment into the history's running totals (same transaction as the insert)"""
+        column = SENTIMENT_COLUMNS.get(comment.sentiment, 'neutral')
+        increments = {
+            'count': HistoryStats.count + 1,
+            column: getattr(HistoryStats, column) + 1,
+            'polarity_sum': HistoryStats.polarity_sum + comment.polarity,
+            'subjectivity_sum': HistoryStats.subjectivity_sum + comment.subjectivity
+        }
+        updated = db.session.execute(
+            db.update(HistoryStats).where(HistoryStats.history_id == history_id).values(**increments)
+        ).rowcount
+        if not updated:
+            # First comment (or a history from before the stats table): rebuild totals from the comments
+            db.session.flush()
+            db.session.merge(self._stats_from_comments(history_id))
+
+    def _add_to_rollups(self, history_id, comment):
+        """Fold one comment into its history's minute, hour and day buckets (same transaction as the insert)"""
+        column = SENTIMENT_COLUMNS.get(comment.sentiment, 'neutral')
+        for granularity in ROLLUP_GRANULARITIES:
+            self._increment_rollup(history_id, granularity, bucket_start(comment.created_at, granularity),
+                                   1, {column: 1}, comment.polarity, comment.subjectivity)
+
+    @staticmethod
+    def _increment_rollup(scope, granularity, bucket, count, column_counts, polarity_sum, subjectivity_sum):
+        """Add totals to one rollup row, creating it if it does not exist yet (the caller commits)"""
+        increments = {
+            'count': SentimentRollup.count + count,
+            'polarity_sum': SentimentRollup.polarity_sum + polarity_sum,
+            'subjectivity_sum': SentimentRollup.subjectivity_sum + subjectivity_sum
+        }
+        for column, n in column_counts.items():
+            increments[column] = getattr(SentimentRollup, column) + n
+        updated = db.session.execute(
+            db.update(SentimentRollup)
+            .where(SentimentRollup.scope == scope, SentimentRollup.granularity == granularity,
+                   SentimentRollup.bucket == bucket)
+            .values(**increments)
+        ).rowcount
+        if not updated:
+            db.session.add(SentimentRollup(
+                scope=scope, granularity=granularity, bucket=bucket, count=count,
+                **{column: column_counts.get(column, 0) for column in SENTIMENT_COLUMNS.values()},
+                polarity_sum=polarity_sum, subjectivity_sum=subjectivity_sum
+            ))
+
+    def _queue_global_rollup(self, comment):
+        """Add a comment to this worker's pending global totals, to be written within GLOBAL_ROLLUP_FLUSH_INTERVAL"""
+        column = SENTIMENT_COLUMNS.get(comment.sentiment, 'neutral')
+        with self._pending_lock:
+            for granularity in ROLLUP_GRANULARITIES:
+                self._merge_pending((granularity, bucket_start(comment.created_at, granularity)),
+                                    1, {column: 1}, comment.polarity, comment.subjectivity)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(GLOBAL_ROLLUP_FLUSH_INTERVAL, self._flush_in_context)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _merge_pending(self, key, count, column_counts, polarity_sum, subjectivity_sum):
+        """Add totals to one pending global bucket (pending lock held)"""
+        pending = self._pending_global.get(key)
+        if pending is None:
+            pending = self._pending_global[key] = [0, {}, 0.0, 0.0]
+        pending[0] += count
+        for column, n in column_counts.items():
+            pending[1][column] = pending[1].get(column, 0) + n
+        pending[2] += polarity_sum
+        pending[3] += subjectivity_sum
+
+    def _flush_in_context(self):
+        with self.app.app_context():
+            self.flush_global_rollups()
+
+    def flush_global_rollups(self):
+        """Write this worker's pending global rollup totals in one short transaction"""
+        with self._pending_lock:
+            pending, self._pending_global = self._pending_global, {}
+            self._flush_timer = None
+        if not pending:
+            return
+        for attempt in range(2):
+            try:
+                # Always in key order, so workers flushing at once lock rows in the same order
+                for (granularity, bucket), totals in sorted(pending.items()):
+                    self._increment_rollup(GLOBAL_SCOPE, granularity, bucket, *totals)
+                db.session.commit()
+                return
+            except IntegrityError:
+                # Another worker created a bucket first; retry, which increments it instead
+                db.session.rollback()
+                if attempt:
+                    break
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error writing global rollups: {e}")
+                break
+        # Keep the totals for the next flush rather than lose them
+        with self._pending_lock:
+            for key, totals in pending.items():
+                self._merge_pending(key, *totals)
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the stored comments, e.g. for comments recorded before rollups existed"""
+        totals = {}
+        rows = db.session.execute(
+            db.select(Comment.history_id, Comment.created_at, Comment.sentiment, Comment.polarity, Comment.subjectivity)
+            .execution_options(yield_per=10000)
+        )
+        for history_id, created_at, sentiment, polarity, subjectivity in rows:
+            column = SENTIMENT_COLUMNS.get(sentiment, 'neutral')
+            for scope in (history_id, GLOBAL_SCOPE):
+                for granularity in ROLLUP_GRANULARITIES:
+                    key = (scope, granularity, bucket_start(created_at, granularity))
+                    row = totals.get(key)
+                    if row is None:
+                        row = totals[key] = SentimentRollup(
+                            scope=scope, granularity=granularity, bucket=key[2], count=0, positive=0,
+                            negative=0, neutral=0, polarity_sum=0.0, subjectivity_sum=0.0
+                        )
+                    row.count += 1
+                    setattr(row, column, getattr(row, column) + 1)
+                    row.polarity_sum += polarity
+                    row.subjectivity_sum += subjectivity
+        db.session.execute(db.delete(SentimentRollup))
+        db.session.add_all(totals.values())
+        db.session.commit()
+
+    def rollups(self, scope, granularity, start, end):
+        """
+        Return one summary per bucket in [start, end); scope is a history ID or GLOBAL_SCOPE
+        Global totals include this worker's comments immediately and other workers' within GLOBAL_ROLLUP_FLUSH_INTERVAL
+        """
+        buckets = rollup_buckets(start, end, granularity)
+        if not buckets:
+            return []
+        if scope == GLOBAL_SCOPE:
+            self.flush_global_rollups()
+        rows = db.session.execute(
+            db.select(SentimentRollup).where(
+                SentimentRollup.scope == scope,
+                SentimentRollup.granularity == granularity,
+                SentimentRollup.bucket >= buckets[0],
+                SentimentRollup.bucket <= buckets[-1]
+            )
+        ).scalars()
+        totals = {
+            row.bucket: (row.count, {sentiment: getattr(row, column) for sentiment, column in SENTIMENT_COLUMNS.items()},
+                         row.polarity_sum, row.subjectivity_sum)
+            for row in rows
+        }
+        return build_series(buckets, totals)
+
+    def _stats_from_comments(self, history_id):
+        """Aggregate a history's comments into a HistoryStats row"""
+        stats = HistoryStats(history_id=history_id, count=0, positive=0, negative=0, neutral=0,
+                             polarity_sum=0.0, subjectivity_sum=0.0)
+        rows = db.session.execute(
+            db.select(Comment.sentiment, db.func.count(Comment.id),
+                      db.func.sum(Comment.polarity), db.func.sum(Comment.subjectivity))
+            .where(Comment.history_id == history_id)
+            .group_by(Comment.sentiment)
+        )
+        for sentiment, count, polarity_sum, subjectivity_sum in rows:
+            column = SENTIMENT_COLUMNS.get(sentiment, 'neutral')
+            setattr(stats, column, getattr(stats, column) + count)
+            stats.count += count
+            stats.polarity_sum += polarity_sum or 0.0
+            stats.subjectivity_sum += subjectivity_sum or 0.0
+        return stats
+
+    def get(self, history_id, comment_id):
+        """Return one comment, or None if it does not belong to this history"""
+        comment = db.session.execute(
+            db.select(Comment).where(Comment.history_id == history_id, Comment.id == comment_id)
+        ).scalar_one_or_none()
+        return comment.to_dict() if comment else None
+
+    def recent(self, history_id, limit, offset=0):
+        """Return up to limit comments, newest first"""
+        comments = db.session.execute(
+            db.select(Comment)
+            .where(Comment.history_id == history_id)
+            .order_by(Comment.id.desc())
+            .limit(limit)
+            .offset(offset)
+        ).scalars()
+        return [comment.to_dict() for comment in comments]
+
+    def before(self, history_id, limit, before_id=None):
+        """Return up to limit comments older than before_id (or the newest when None), newest first"""
+        query = db.select(Comment).where(Comment.history_id == history_id)
+        if before_id is not None:
+            query = query.where(Comment.id < before_id)
+        comments = db.session.execute(query.order_by(Comment.id.desc()).limit(limit)).scalars()
+        return [comment.to_dict() for comment in comments]
+
+    def summary(self, history_id):
+        """Return count, {sentiment: count} and mean polarity/subjectivity from the running totals"""
+        stats = db.session.get(HistoryStats, history_id)
+        if stats is None:
+            stats = self._stats_from_comments(history_id)
+        return build_summary(
+            stats.count,
+            {sentiment: getattr(stats, column) for sentiment, column in SENTIMENT_COLUMNS.items()},
+            stats.polarity_sum,
+            stats.subjectivity_sum
+        )
+
+    def count(self, history_id):
+        """Return the number of comments in a history"""
+        return self.summary(history_id)['count']
+
+    def sentiment_counts(self, history_id):
+        """Return {sentiment: count} for a history"""
+        return self.summary(history_id)['sentiment_counts']
+
+    def clear(self, history_id):
+        """Delete every comment in a history"""
+        db.session.execute(db.delete(Comment).where(Comment.history_id == history_id))
+        db.session.execute(db.delete(HistoryStats).where(HistoryStats.history_id == history_id))
+        db.session.execute(db.delete(SentimentRollup).where(SentimentRollup.scope == history_id))
+        db.session.commit()
+
+
+class MemoryHistoryStore:
+    """Process-local history store, useful for development and single-worker deployments"""
+
+    def __init__(self, app=None):
+        self._histories = {}
+        self._stats = {}  # history_id -> [{sentiment: count}, polarity sum, subjectivity sum]
+        self._rollups = {}  # (scope, granularity) -> {bucket: [{sentiment: count}, polarity sum, subjectivity sum]}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, history_id, entry):
+        now = datetime.now()
+        with self._lock:
+            comment = dict(entry, id=self._next_id, timestamp=now.strftime(TIMESTAMP_FORMAT))
+            self._next_id += 1
+            self._histories.setdefault(history_id, []).append(comment)
+            stats = self._stats.setdefault(history_id, [dict.fromkeys(SENTIMENTS, 0), 0.0, 0.0])
+            stats[0][comment['sentiment']] = stats[0].get(comment['sentiment'], 0) + 1
+            stats[1] += comment['polarity']
+            stats[2] += comment['subjectivity']
+            for scope in (history_id, GLOBAL_SCOPE):
+                for granularity in ROLLUP_GRANULARITIES:
+                    buckets = self._rollups.setdefault((scope, granularity), {})
+                    rollup = buckets.setdefault(bucket_start(now, granularity), [dict.fromkeys(SENTIMENTS, 0), 0.0, 0.0])
+                    rollup[0][comment['sentiment']] = rollup[0].get(comment['sentiment'], 0) + 1
+                    rollup[1] += comment['polarity']
+                    rollup[2] += comment['subjectivity']
+        return dict(comment)
+
+    def get(self, history_id, comment_id):
+        for comment in self._histories.get(history_id, []):
+            if comment['id'] == comment_id:
+                return dict(comment)
+        return None
+
+    def recent(self, history_id, limit, offset=0):
+        comments = self._histories.get(history_id, [])
+        end = len(comments) - offset
+        return [dict(c) for c in reversed(comments[max(end - limit, 0):max(end, 0)])]
+
+    def before(self, history_id, limit, before_id=None):
+        comments = self._histories.get(history_id, [])
+        if before_id is not None:
+            comments = [c for c in comments if c['id'] < before_id]
+        return [dict(c) for c in reversed(comments[-limit:])] if limit > 0 else []
+
+    def summary(self, history_id):
+        with self._lock:
+            counts, polarity_sum, subjectivity_sum = self._stats.get(history_id, [dict.fromkeys(SENTIMENTS, 0), 0.0, 0.0])
+            counts = dict(counts)
+        return build_summary(sum(counts.values()), counts, polarity_sum, subjectivity_sum)
+
+    def rollups(self, scope, granularity, start, end):
+        buckets = rollup_buckets(start, end, granularity)
+        with self._lock:
+            stored = self._rollups.get((scope, granularity), {})
+            totals = {}
+            for bucket in buckets:
+                rollup = stored.get(bucket)
+                if rollup is not None:
+                    totals[bucket] = (sum(rollup[0].values()), dict(rollup[0]), rollup[1], rollup[2])
+        return build_series(buckets, totals)
+
+    def count(self, history_id):
+        return len(self._histories.get(history_id, []))
+
+    def sentiment_counts(self, history_id):
+        return self.summary(history_id)['sentiment_counts']
+
+    def clear(self, history_id):
+        with self._lock:
+            self._histories.pop(history_id, None)
+            self._stats.pop(history_id, None)
+            for granularity in ROLLUP_GRANULARITIES:
+                self._rollups.pop((history_id, granularity), None)
+
+
+HISTORY_STORES = {
+    'sql': SQLHistoryStore,
+    'memory': MemoryHistoryStore,
+}
+
+
+def create_history_store(app, name=None):
+    """Create the history store named by HISTORY_STORE ('sql' by default)"""
+    name = name or os.environ.get('HISTORY_STORE', 'sql')
+    if name not in HISTORY_STORES:
+        raise ValueError(f"Unknown history store: {name}")
+    return HISTORY_STORES[name](app)
@@ -0,0 +1,115 @@
+"""
+Sentiment Analysis Tool - Persistent AI Improvement Cache
+SQLite-backed, size-bounded cache of tone improvements shared by all workers
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+
+from sqlite_store import SQLiteFile
+
+# Hits refresh an entry's last_used only when it is older than this, so most hits are plain reads
+TOUCH_INTERVAL = 60.0
+
+
+class ImprovementCache:
+    """Least-recently-used cache of improve_sentiment results keyed on text, model and prompt version"""
+
+    def __init__(self, path, maxsize=10000, touch_interval=TOUCH_INTERVAL):
+        self.path = path
+        self.maxsize = maxsize
+        self.touch_interval = touch_interval
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.maxsize > 0:
+            self._db = SQLiteFile(path, schema=(
+                'CREATE TABLE IF NOT EXISTS improvements ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)',
+                'CREATE INDEX IF NOT EXISTS ix_improvements_last_used ON improvements (last_used)',
+                # Entry count kept up to date by triggers, so inserts never count the table
+                'CREATE TABLE IF NOT EXISTS improvements_size (id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL)',
+                'INSERT OR IGNORE INTO improvements_size (id, entries) SELECT 1, COUNT(*) FROM improvements',
+                'CREATE TRIGGER IF NOT EXISTS improvements_inserted AFTER INSERT ON improvements '
+                'BEGIN UPDATE improvements_size SET entries = entries + 1 WHERE id = 1; END',
+                'CREATE TRIGGER IF NOT EXISTS improvements_deleted AFTER DELETE ON improvements '
+                'BEGIN UPDATE improvements_size SET entries = entries - 1 WHERE id = 1; END',
+            ))
+
+    @staticmethod
+    def make_key(text, model, prompt_version):
+        """Hash the inputs that determine an improvement"""
+        return hashlib.sha256(json.dumps([model, prompt_version, text]).encode('utf-8')).hexdigest()
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        """Return the cached improvement dict for key, or None"""
+        if self.maxsize <= 0:
+            return None
+        try:
+            with self._db.connection() as conn:
+                row = conn.execute('SELECT value, last_used FROM improvements WHERE key = ?', (key,)).fetchone()
+                now = time.time()
+                # Recency only needs to be roughly right for eviction; skip the write for recently used entries
+                if row is not None and now - row[1] >= self.touch_interval:
+                    conn.execute('UPDATE improvements SET last_used = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            logging.error(f"Improvement cache read failed: {e}")
+            return None
+        if row is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return json.loads(row[0])
+
+    def set(self, key, improvement):
+        """Store an improvement dict, evicting the least recently used entries past maxsize"""
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        try:
+            with self._db.connection() as conn:
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the size trigger
+                conn.execute(
+                    'INSERT INTO improvements (key, value, created_at, last_used) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, last_used = excluded.last_used',
+                    (key, json.dumps(improvement), now, now)
+                )
+                excess = conn.execute('SELECT entries FROM improvements_size').fetchone()[0] - self.maxsize
+                if excess > 0:
+                    conn.execute(
+                        'DELETE FROM improvements WHERE key IN '
+                        '(SELECT key FROM improvements ORDER BY last_used LIMIT ?)',
+                        (excess,)
+                    )
+                    with self._stats_lock:
+                        self.evictions += excess
+        except sqlite3.Error as e:
+            logging.error(f"Improvement cache write failed: {e}")
+
+    def stats(self):
+        """Return hit/miss/eviction counters for this worker and the shared entry count"""
+        size = 0
+        if self.maxsize > 0:
+            try:
+                size = self._db.connection().execute('SELECT entries FROM improvements_size').fetchone()[0]
+            except sqlite3.Error:
+                pass
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': size,
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,175 @@
+"""
+Sentiment Analysis Tool - Live Analysis
+Keeps a sentence-scored copy of text being edited and re-scores only the sentences an edit touches
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from analysis import score_texts
+from long_document import DocumentAggregate, split_sentences
+from result_cache import LRUCache
+from sqlite_store import SQLiteFile
+
+
+class LiveSessionError(Exception):
+    """The edit does not apply to the server's copy of the text; the client should resend the full text"""
+
+
+class LiveDocument:
+    """Text being edited, with the score of each of its sentences"""
+
+    def __init__(self):
+        self.text = ''
+        self.version = 0
+        self.sentences = []  # [(start, text, polarity, subjectivity)]
+        self.lock = threading.Lock()
+
+    def apply_diff(self, version, start, end, replacement, max_length):
+        """
+        Replace text[start:end] of the given version with replacement
+        Returns the change as in set_text; raises LiveSessionError if version is stale or the span is invalid
+        """
+        if version != self.version:
+            raise LiveSessionError(f'Expected version {self.version}, got {version}')
+        if not (isinstance(start, int) and isinstance(end, int) and 0 <= start <= end <= len(self.text)):
+            raise LiveSessionError('Edit span is outside the text')
+        return self.set_text(self.text[:start] + replacement + self.text[end:], max_length)
+
+    def set_text(self, text, max_length):
+        """
+        Replace the whole text
+        Returns (first, old_end, new_end, shift): sentences first..new_end-1 replace the previous sentences
+        first..old_end-1, and the offsets of every sentence after them moved by shift characters
+        """
+        if len(text) > max_length:
+            raise ValueError(f'Text too long (max {max_length} characters)')
+        change = self._replace(text)
+        self.version += 1
+        return change
+
+    def restore(self, text, version):
+        """Bring the document to a text and version saved by another worker"""
+        self._replace(text)
+        self.version = version
+
+    def _replace(self, text):
+        # Unchanged sentences keep their scores; only new sentence texts are scored (or served from the analysis cache)
+        known = {sentence: (polarity, subjectivity) for _start, sentence, polarity, subjectivity in self.sentences}
+        spans = list(split_sentences([text]))
+        missing = [sentence for _start, sentence in spans if sentence not in known]
+        if missing:
+            known.update(zip(missing, score_texts(missing)))
+
+        sentences = [(start, sentence) + known[sentence] for start, sentence in spans]
+
+        # Sentences before the edit keep their offsets; sentences after it keep their text and move by shift
+        old = self.sentences
+        shift = len(text) - len(self.text)
+        first = 0
+        while first < min(len(old), len(sentences)) and old[first][:2] == sentences[first][:2]:
+            first += 1
+        after = 0
+        while (after < min(len(old), len(sentences)) - first
+               and old[-1 - after][1] == sentences[-1 - after][1]
+               and old[-1 - after][0] + shift == sentences[-1 - after][0]):
+            after += 1
+        self.text = text
+        self.sentences = sentences
+        return first, len(old) - after, len(sentences) - after, shift
+
+    def summary(self):
+        """Return the length-weighted score of the whole text"""
+        aggregate = DocumentAggregate()
+        for index in range(len(self.sentences)):
+            aggregate.add(self.sentence(index))
+        result = aggregate.result()
+        result['char_count'] = len(self.text)
+        return result
+
+    def sentence(self, index):
+        """Return one sentence's result with its character span"""
+        start, text, polarity, subjectivity = self.sentences[index]
+        return {
+            'index': index,
+            'start': start,
+            'end': start + len(text),
+            'polarity': polarity,
+            'subjectivity': subjectivity,
+            'word_count': len(text.split())
+        }
+
+
+class LiveSessions:
+    """
+    Bounded set of live documents; an evicted or unknown session just makes the client resend its text
+    With path set, each document's text is also saved to a SQLite file shared by all workers, so an edit that lands
+    on another worker rebuilds the document there (re-scoring only sentences that worker has not seen) instead of
+    forcing a resync
+    """
+
+    def __init__(self, maxsize=1000, ttl=900.0, path=None):
+        self.ttl = ttl
+        self.path = path
+        self._documents = LRUCache(maxsize=maxsize, ttl=ttl)
+        if self.path:
+            self._db = SQLiteFile(path, schema=(
+                'CREATE TABLE IF NOT EXISTS live_sessions ('
+                'id TEXT PRIMARY KEY, text TEXT NOT NULL, version INTEGER NOT NULL, updated_at REAL NOT NULL)',
+                'CREATE INDEX IF NOT EXISTS ix_live_sessions_updated_at ON live_sessions (updated_at)',
+            ))
+
+    def get(self, session_id, version=None):
+        """
+        Return the live document for session_id, or None
+        With version given, a document saved at that version by another worker is loaded in place of a stale copy
+        """
+        document = self._documents.get(session_id)
+        if not self.path or (document is not None and (version is None or document.version == version)):
+            return document
+        try:
+            row = self._db.connection().execute(
+                'SELECT text, version FROM live_sessions WHERE id = ? AND updated_at >= ?',
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Live session lookup failed: {e}")
+            return document
+        if row is None:
+            return document
+        if document is None:
+            document = LiveDocument()
+            self._documents.set(session_id, document)
+        with document.lock:
+            if document.version != row[1]:
+                document.restore(row[0], row[1])
+        return document
+
+    def create(self):
+        """Start a new live document and return (session ID, document)"""
+        session_id = uuid.uuid4().hex
+        document = LiveDocument()
+        self._documents.set(session_id, document)
+        return session_id, document
+
+    def touch(self, session_id, document):
+        """Restart a session's idle timeout after an edit and save its text for other workers (document lock held)"""
+        self._documents.set(session_id, document)
+        if not self.path:
+            return
+        now = time.time()
+        try:
+            with self._db.connection() as conn:
+                conn.execute('INSERT OR REPLACE INTO live_sessions (id, text, version, updated_at) VALUES (?, ?, ?, ?)',
+                             (session_id, document.text, document.version, now))
+                if document.version == 1:
+                    # Expire idle sessions as new ones start
+                    conn.execute('DELETE FROM live_sessions WHERE updated_at < ?', (now - self.ttl,))
+        except sqlite3.Error as e:
+            logging.error(f"Saving live session failed: {e}")
+
+    def __len__(self):
+        return len(self._documents)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Load Test
+Drives a running server with a configurable mix of /analyze, /api/analyze and /review/<id> requests and reports
+throughput, p50/p95/p99 latency and error rates per operation
+
+Usage:
+    python load_test.py --url http://127.0.0.1:5000 --concurrency 16 --duration 60
+    python load_test.py --mix api_analyze=8,analyze=2,review=1 --sizes short=6,medium=3,long=1 --json report.json
+
+Point the server at stub_llm.py (UPSTREAM_URL plus any DEEPSEEK_API_KEY) so reviews exercise the upstream path
+without calling the paid API. Each virtual user keeps its own session, so reviews target that user's own comments.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from benchmark import TEXT_SIZES, make_text
+
+OPERATIONS = ('analyze', 'api_analyze', 'review')
+DEFAULT_MIX = 'api_analyze=6,analyze=3,review=1'
+DEFAULT_SIZES = 'short=6,medium=3,long=1'
+REVIEW_POLL_INTERVAL = 0.25
+# Server counters diffed across the run (per worker unless the server sets METRICS_DIR)
+SERVER_COUNTERS = ('sentiment_improvements_total', 'sentiment_requests_shed_total')
+
+
+def parse_weights(value, choices):
+    """Parse "name=weight,..." into ([names], [weights]), rejecting names not in choices"""
+    names, weights = [], []
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in choices:
+            raise argparse.ArgumentTypeError(f"Unknown name {name!r} (choose from {', '.join(choices)})")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+class Recorder:
+    """Thread-safe collection of (operation, latency, outcome) samples"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, operation, latency, outcome):
+        with self._lock:
+            self.latencies[operation].append(latency)
+            self.outcomes[operation][outcome] += 1
+
+    def report(self, elapsed):
+        """Summarize the run: throughput, latency percentiles in ms and error rate per operation"""
+        operations = {}
+        for operation in sorted(self.latencies):
+            ordered = sorted(self.latencies[operation])
+            outcomes = self.outcomes[operation]
+            count = len(ordered)
+            errors = count - outcomes['ok']
+            operations[operation] = {
+                'requests': count,
+                'throughput': count / elapsed,
+                'p50_ms': percentile(ordered, 50) * 1000,
+                'p95_ms': percentile(ordered, 95) * 1000,
+                'p99_ms': percentile(ordered, 99) * 1000,
+                'max_ms': ordered[-1] * 1000,
+                'error_rate': errors / count,
+                'outcomes': dict(outcomes)
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        errors = sum(sum(outcomes.values()) - outcomes['ok'] for outcomes in self.outcomes.values())
+        return {
+            'elapsed': elapsed,
+            'requests': total,
+            'throughput': total / elapsed if elapsed else 0.0,
+            'error_rate': errors / total if total else 0.0,
+            'operations': operations
+        }
+
+
+def scrape_counters(base_url):
+    """Read SERVER_COUNTERS from the server's /metrics, or return {} if unavailable"""
+    try:
+        response = requests.get(f"{base_url.rstrip('/')}/metrics", timeout=5)
+    except requests.RequestException:
+        return {}
+    counters = {}
+    if response.status_code == 200:
+        for line in response.text.splitlines():
+            if line.startswith(SERVER_COUNTERS):
+                series, _, value = line.rpartition(' ')
+                counters[series] = float(value)
+    return counters
+
+
+def outcome_of(response):
+    """Classify a response: 'ok' or the status code"""
+    return 'ok' if response.status_code == 200 else str(response.status_code)
+
+
+class VirtualUser:
+    """One client session issuing operations drawn from the mix until the run ends"""
+
+    def __init__(self, base_url, options, recorder, seed):
+        self.base_url = base_url.rstrip('/')
+        self.options = options
+        self.recorder = recorder
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+        self.comment_ids = []
+
+    def text(self):
+        size = self.random.choices(*self.options.sizes)[0]
+        # Vary the length within the bucket so caches see distinct texts
+        return make_text(int(TEXT_SIZES[size] * self.random.uniform(0.5, 1.0)), self.random)
+
+    def timed(self, operation, fn):
+        start = time.perf_counter()
+        try:
+            outcome = fn()
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        self.recorder.record(operation, time.perf_counter() - start, outcome)
+        return outcome
+
+    def analyze(self):
+        def call():
+            response = self.session.post(f'{self.base_url}/analyze', data={'text': self.text()},
+                                         timeout=self.options.timeout)
+            return outcome_of(response)
+        if self.timed('analyze', call) == 'ok' and len(self.comment_ids) < 50:
+            response = self.session.get(f'{self.base_url}/api/history', params={'limit': 1}, timeout=self.options.timeout)
+            if response.status_code == 200 and response.json().get('data'):
+                self.comment_ids.append(response.json()['data'][0]['id'])
+
+    def api_analyze(self):
+        def call():
+            response = self.session.post(f'{self.base_url}/api/analyze', json={'text': self.text()},
+                                         timeout=self.options.timeout)
+            return outcome_of(response)
+        self.timed('api_analyze', call)
+
+    def review(self):
+        if not self.comment_ids:
+            self.analyze()  # A review needs a comment of this user's own
+            if not self.comment_ids:
+                return
+        comment_id = self.comment_ids.pop(self.random.randrange(len(self.comment_ids)))
+
+        def call():
+            # Time until the review is ready: the page itself, then polling if it came back pending
+            deadline = time.monotonic() + self.options.timeout
+            response = self.session.get(f'{self.base_url}/review/{comment_id}', timeout=self.options.timeout)
+            if response.status_code != 200 or 'Preparing Review' not in response.text:
+                return outcome_of(response)
+            while time.monotonic() < deadline:
+                time.sleep(REVIEW_POLL_INTERVAL)
+                response = self.session.get(f'{self.base_url}/api/review/{comment_id}', timeout=self.options.timeout)
+                if response.status_code != 200:
+                    return outcome_of(response)
+                if response.json().get('status') == 'done':
+                    return 'ok'
+            return 'review_timeout'
+        self.timed('review', call)
+
+    def run(self, stop):
+        while not stop():
+            getattr(self, self.random.choices(*self.options.mix)[0])()
+
+
+def run_load(options):
+    """Run the load test and return the report"""
+    recorder = Recorder()
+    issued = Counter()
+    lock = threading.Lock()
+    end_time = time.monotonic() + options.duration
+
+    def stop():
+        if time.monotonic() >= end_time:
+            return True
+        if options.requests:
+            with lock:
+                issued['n'] += 1
+                return issued['n'] > options.requests
+        return False
+
+    users = [VirtualUser(options.url, options, recorder, options.seed + index) for index in range(options.concurrency)]
+    threads = [threading.Thread(target=user.run, args=(stop,), daemon=True) for user in users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.perf_counter() - start)
+
+
+def print_report(report):
+    print(f"\n{'operation':<14}{'requests':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>9}")
+    for operation, stats in report['operations'].items():
+        print(f"{operation:<14}{stats['requests']:>9}{stats['throughput']:>9.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}{stats['error_rate']:>9.1%}")
+        failures = {outcome: n for outcome, n in stats['outcomes'].items() if outcome != 'ok'}
+        if failures:
+            print(f"{'':<14}failures: {', '.join(f'{outcome}={n}' for outcome, n in sorted(failures.items()))}")
+    print(f"\nTotal: {report['requests']} requests in {report['elapsed']:.1f}s, "
+          f"{report['throughput']:.1f} req/s, {report['error_rate']:.1%} errors")
+    for series, delta in sorted(report.get('server', {}).items()):
+        print(f"  {series}: +{delta:g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a running sentiment analysis server')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='server base URL (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users (default: 8)')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run (default: 30)')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many operations (default: run for --duration)')
+    parser.add_argument('--mix', type=lambda value: parse_weights(value, OPERATIONS), default=DEFAULT_MIX,
+                        help=f'operation weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--sizes', type=lambda value: parse_weights(value, tuple(TEXT_SIZES)), default=DEFAULT_SIZES,
+                        help=f'text size weights; sizes are up to {TEXT_SIZES} characters (default: {DEFAULT_SIZES})')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds, and review completion timeout (default: 30)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed (default: 1)')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    options = parser.parse_args()
+
+    try:
+        requests.get(f"{options.url.rstrip('/')}/health", timeout=5)
+    except requests.RequestException as e:
+        print(f"❌ Cannot reach {options.url}: {e}")
+        sys.exit(1)
+
+    before = scrape_counters(options.url)
+    report = run_load(options)
+    after = scrape_counters(options.url)
+    report['server'] = {series: value - before.get(series, 0.0) for series, value in after.items()
+                        if value != before.get(series, 0.0)}
+    report['options'] = {
+        'url': options.url,
+        'concurrency': options.concurrency,
+        'duration': options.duration,
+        'requests': options.requests,
+        'mix': dict(zip(*options.mix)),
+        'sizes': dict(zip(*options.sizes))
+    }
+    print_report(report)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {options.json}")
+
+
+if __name__ == '__main__':
+    main()
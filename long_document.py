@@ -0,0 +1,219 @@
+"""
+Sentiment Analysis Tool - Long Document Analysis
+Splits long text into sentences as it is read, scores them in blocks and aggregates a length-weighted document score
+"""
+
+import codecs
+import multiprocessing
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from analysis import MAX_TEXT_LENGTH, classify_polarity, score_texts, score_uncached
+
+# Sentence boundaries: whitespace after terminal punctuation, or a blank line
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+_LAST_WHITESPACE = re.compile(r'\s(?=\S*$)')
+_NON_SPACE = re.compile(r'\S')
+
+READ_SIZE = 64 * 1024
+BLOCK_SENTENCES = 256
+
+# Process pool for large documents; 0 scores every block in the request worker
+DOCUMENT_WORKERS = int(os.environ.get('DOCUMENT_WORKERS', 0))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def read_text_chunks(stream, size=READ_SIZE):
+    """Decode a binary stream as UTF-8, one chunk at a time"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        data = stream.read(size)
+        if not data:
+            break
+        yield decoder.decode(data)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _cut(text, pos, max_chars):
+    """
+    End of the first piece of text[pos:] when, stripped, it is longer than max_chars: the last whitespace before the
+    limit, or the limit itself. None when it fits
+    """
+    start = _NON_SPACE.search(text, pos)
+    if start is None or _NON_SPACE.search(text, start.start() + max_chars) is None:
+        return None
+    start = start.start()
+    space = _LAST_WHITESPACE.search(text, start, start + max_chars)
+    return space.start() if space and space.start() > start else start + max_chars
+
+
+def split_sentences(chunks, max_chars=MAX_TEXT_LENGTH):
+    """
+    Split text arriving in chunks into sentences without holding more than one chunk plus one sentence
+    Yields (start offset, sentence); sentences longer than max_chars are cut at the last whitespace before the limit
+    """
+    buffer = ''
+    offset = 0
+
+    def strip(start, text):
+        stripped = text.lstrip()
+        start += len(text) - len(stripped)
+        stripped = stripped.rstrip()
+        if stripped:
+            yield start, stripped
+
+    def emit(start, text):
+        pos = 0
+        end = _cut(text, pos, max_chars)
+        while end is not None:
+            yield from strip(start + pos, text[pos:end])
+            pos = end
+            end = _cut(text, pos, max_chars)
+        yield from strip(start + pos, text[pos:])
+
+    for chunk in chunks:
+        buffer += chunk
+        consumed = 0
+        for match in _SENTENCE_BREAK.finditer(buffer):
+            if match.end() == len(buffer):
+                break  # The whitespace may continue in the next chunk
+            yield from emit(offset + consumed, buffer[consumed:match.start()])
+            consumed = match.end()
+        # An unfinished sentence already past max_chars is cut now, exactly where emit would cut the whole sentence,
+        # so the pieces do not depend on how the text was chunked
+        end = _cut(buffer, consumed, max_chars)
+        while end is not None:
+            yield from strip(offset + consumed, buffer[consumed:end])
+            consumed = end
+            end = _cut(buffer, consumed, max_chars)
+        buffer = buffer[consumed:]
+        offset += consumed
+    yield from emit(offset, buffer)
+
+
+def _blocks(sentences, size=BLOCK_SENTENCES):
+    block = []
+    for sentence in sentences:
+        block.append(sentence)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _get_pool():
+    """Create the scoring pool on first use (in the worker process, never before a fork)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(DOCUMENT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _scored_blocks(blocks, workers):
+    """
+    Yield (block, scores) in order
+    The first block is scored in-process through the analysis cache. Later blocks bypass the cache so one huge
+    document cannot evict everyone else's entries; with workers they go to the pool, at most two per worker
+    in flight so memory stays bounded
+    """
+    blocks = iter(blocks)
+    first = next(blocks, None)
+    if first is None:
+        return
+    yield first, score_texts([text for _start, text in first])
+
+    if workers <= 0:
+        for block in blocks:
+            yield block, score_uncached([text for _start, text in block])
+        return
+
+    pool = _get_pool()
+    pending = deque()
+    for block in blocks:
+        pending.append((block, pool.submit(score_uncached, [text for _start, text in block])))
+        if len(pending) >= workers * 2:
+            done, future = pending.popleft()
+            yield done, future.result()
+    while pending:
+        done, future = pending.popleft()
+        yield done, future.result()
+
+
+class DocumentAggregate:
+    """Running length-weighted document score: each sentence counts in proportion to its word count"""
+
+    def __init__(self):
+        self.sentence_count = 0
+        self.word_count = 0
+        self.char_count = 0
+        self.polarity_sum = 0.0
+        self.subjectivity_sum = 0.0
+
+    def add(self, sentence):
+        self.sentence_count += 1
+        self.word_count += sentence['word_count']
+        self.char_count = max(self.char_count, sentence['end'])
+        self.polarity_sum += sentence['polarity'] * sentence['word_count']
+        self.subjectivity_sum += sentence['subjectivity'] * sentence['word_count']
+
+    def result(self):
+        """Return an analyze_sentiment-style result for the whole document"""
+        polarity = self.polarity_sum / self.word_count if self.word_count else 0.0
+        sentiment, confidence, confidence_level = classify_polarity(polarity)
+        return {
+            'polarity': polarity,
+            'subjectivity': self.subjectivity_sum / self.word_count if self.word_count else 0.0,
+            'sentiment': sentiment,
+            'confidence': confidence,
+            'confidence_level': confidence_level,
+            'word_count': self.word_count,
+            'char_count': self.char_count,
+            'sentence_count': self.sentence_count,
+            'timestamp': datetime.now().isoformat()
+        }
+
+
+def score_document(chunks, workers=None, aggregate=None):
+    """
+    Score a document given as an iterable of text chunks
+    Yields one result per sentence with its character span; totals accumulate in aggregate if given
+    """
+    workers = DOCUMENT_WORKERS if workers is None else workers
+    index = 0
+    for block, scores in _scored_blocks(_blocks(split_sentences(chunks)), workers):
+        for (start, text), (polarity, subjectivity) in zip(block, scores):
+            sentence = {
+                'index': index,
+                'start': start,
+                'end': start + len(text),
+                'polarity': polarity,
+                'subjectivity': subjectivity,
+                'sentiment': classify_polarity(polarity)[0],
+                'word_count': len(text.split())
+            }
+            if aggregate is not None:
+                aggregate.add(sentence)
+            index += 1
+            yield sentence
+
+
+def analyze_document(text, workers=None):
+    """
+    Analyze a long text held in memory
+    Returns (document result, per-sentence results)
+    """
+    aggregate = DocumentAggregate()
+    sentences = list(score_document([text], workers, aggregate))
+    result = aggregate.result()
+    result['char_count'] = len(text)
+    return result, sentences
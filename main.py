@@ -1,12 +1,26 @@
 import os
+import asyncio
 import logging
 import json
 from datetime import datetime
 import uuid
-import re
-import requests
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-from textblob import TextBlob
+import time
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context, g, send_file
+from flask import before_render_template, template_rendered
+from analysis import MAX_TEXT_LENGTH, AnalysisResult, analysis_cache, analyze_sentiment, analyze_item, analyze_sentiment_batch, parse_fields
+from history_store import GLOBAL_SCOPE, ROLLUP_GRANULARITIES, bucket_start, create_history_store
+from upstream_client import UpstreamClient, UpstreamError
+from improvement_cache import ImprovementCache
+from review_jobs import ReviewJobQueue, QueueFullError, SharedReviewState
+from singleflight import SingleFlight
+from long_document import DocumentAggregate, analyze_document, read_text_chunks, score_document
+from live_analysis import LiveSessions, LiveSessionError
+from serialization import choose_format, decode_msgpack, dumps, encode, to_columnar, MSGPACK_MIMETYPES
+from admission import AdmissionController, ConcurrencyLimiter, Rejected, create_token_buckets, queue_age
+from metrics import registry as metrics, time_stage
+from profiling import RequestProfiler, PROFILE_HEADER, PROFILE_PARAM
+from warmup import WarmUp
+from rewrite_rules import RewriteRules, DEFAULT_RULES_PATH
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -15,66 +29,277 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
+# Input limits
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 5000))
+MAX_STREAM_LINE_BYTES = int(os.environ.get("MAX_STREAM_LINE_BYTES", 64 * 1024))
+# Longer form submissions are scored sentence by sentence; the document API streams and has its own limit
+MAX_FORM_TEXT_LENGTH = int(os.environ.get("MAX_FORM_TEXT_LENGTH", 100000))
+MAX_DOCUMENT_LENGTH = int(os.environ.get("MAX_DOCUMENT_LENGTH", 20 * 1024 * 1024))
 
-# Helper function to get or create user session comment history
-def get_comment_history():
-    """Get comment history for current session"""
-    if 'comment_history' not in session:
-        session['comment_history'] = []
-    return session['comment_history']
+# Server-side comment history; the session cookie only carries a history ID
+history_store = create_history_store(app)
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", 20))
+MAX_HISTORY_API_PAGE_SIZE = 200
+# Most buckets one rollup query may return (a day of minutes)
+MAX_ROLLUP_BUCKETS = 1440
+DEFAULT_ROLLUP_BUCKETS = 24
+
+# Admission control: each route group runs a bounded number of requests with a short wait queue, and clients can be
+# rate limited per group; excess load gets a fast 429/503 with Retry-After instead of piling up
+SCORING_ENDPOINTS = ('analyze', 'api_analyze', 'api_analyze_batch', 'api_analyze_live')
+# Streamed NDJSON and document uploads hold their slot until the whole body is scored, so they get their own group
+# and cannot starve interactive scoring
+STREAMING_ENDPOINTS = ('api_analyze_stream', 'api_analyze_document')
+REVIEW_ENDPOINTS = ('review_comment', 'api_review_status')
+admission = AdmissionController(
+    groups={
+        'scoring': ConcurrencyLimiter(
+            int(os.environ.get("SCORING_MAX_CONCURRENCY", 32)),
+            int(os.environ.get("SCORING_MAX_QUEUE", 64)),
+            float(os.environ.get("SCORING_QUEUE_TIMEOUT", 1))
+        ),
+        'streaming': ConcurrencyLimiter(
+            int(os.environ.get("STREAMING_MAX_CONCURRENCY", 8)),
+            int(os.environ.get("STREAMING_MAX_QUEUE", 8)),
+            float(os.environ.get("STREAMING_QUEUE_TIMEOUT", 1))
+        ),
+        'review': ConcurrencyLimiter(
+            int(os.environ.get("REVIEW_MAX_CONCURRENCY", 8)),
+            int(os.environ.get("REVIEW_MAX_QUEUE", 16)),
+            float(os.environ.get("REVIEW_QUEUE_TIMEOUT", 2))
+        ),
+    },
+    endpoint_groups={
+        **dict.fromkeys(SCORING_ENDPOINTS, 'scoring'),
+        **dict.fromkeys(STREAMING_ENDPOINTS, 'streaming'),
+        **dict.fromkeys(REVIEW_ENDPOINTS, 'review'),
+    },
+    buckets=create_token_buckets(
+        float(os.environ.get("RATE_LIMIT", 0)),
+        float(os.environ.get("RATE_LIMIT_BURST", 0)),
+        store=os.environ.get("RATE_LIMIT_STORE", "memory"),
+        path=os.environ.get("RATE_LIMIT_PATH") or os.path.join(app.instance_path, 'rate_limits.db')
+    )
+)
+# Requests that already waited this long in the proxy/socket queue (X-Request-Start) are shed; 0 disables
+MAX_REQUEST_QUEUE_AGE = float(os.environ.get("MAX_REQUEST_QUEUE_AGE", 0))
+TRUST_PROXY_HEADERS = os.environ.get("TRUST_PROXY_HEADERS", "").lower() in ("1", "true", "yes")
+
+# Documents being edited with live analysis, re-scored one changed sentence at a time
+live_sessions = LiveSessions(
+    maxsize=int(os.environ.get("LIVE_SESSIONS", 1000)),
+    ttl=float(os.environ.get("LIVE_SESSION_TTL", 900)),
+    path=os.environ.get("LIVE_SESSION_PATH") or os.path.join(app.instance_path, 'live_sessions.db')
+)
+
+# Pooled client for the AI tone-improvement upstream (OpenRouter by default)
+upstream_client = UpstreamClient.from_env()
+
+# improvement_type of results that came from the upstream model rather than the fallback
+AI_IMPROVEMENT_TYPE = 'AI-Powered Enhancement'
+
+# AI tone-improvement model and prompt; bump the version whenever the prompt changes to invalidate cached results
+DEEPSEEK_MODEL = 'deepseek/deepseek-chat'
+IMPROVEMENT_PROMPT_VERSION = 1
+IMPROVEMENT_SYSTEM_PROMPT = 'You are an expert at improving the tone of text while preserving the original meaning exactly. Your task is to make negative or harsh comments more positive and constructive, but keep the core message and intent identical. Make minimal changes - only soften harsh language and improve tone. Do not add extra content or change the meaning. Respond with only the improved text, nothing else.'
+
+# Persistent cache of AI improvements shared by all workers; size 0 disables it
+improvement_cache = ImprovementCache(
+    os.environ.get("IMPROVEMENT_CACHE_PATH") or os.path.join(app.instance_path, 'improvement_cache.db'),
+    maxsize=int(os.environ.get("IMPROVEMENT_CACHE_SIZE", 10000))
+)
+
+# Softening lexicon used when the AI is unavailable; only very negative text is rewritten
+rewrite_rules = RewriteRules.load(os.environ.get("REWRITE_RULES_PATH") or DEFAULT_RULES_PATH)
+FALLBACK_REWRITE_POLARITY = -0.5
+
+# Coalesces identical in-flight improvement requests; SINGLEFLIGHT_LOCK_DIR extends this across workers.
+# Waiters give up no sooner than the upstream call they wait on could, so a slow upstream is not called again
+improvement_flight = SingleFlight(
+    lock_dir=os.environ.get("SINGLEFLIGHT_LOCK_DIR"),
+    lock_timeout=float(os.environ.get("SINGLEFLIGHT_LOCK_TIMEOUT") or upstream_client.max_call_duration())
+)
+
+# Background workers for reviews, so slow upstream calls never hold a request worker
+review_jobs = ReviewJobQueue(
+    max_workers=int(os.environ.get("REVIEW_WORKERS", 4)),
+    max_pending=int(os.environ.get("REVIEW_QUEUE_SIZE", 32)),
+    result_ttl=float(os.environ.get("REVIEW_RESULT_TTL", 600))
+)
+# Claims and finished reviews shared by all workers, so polls and reloads on another worker find them
+review_state = SharedReviewState(
+    os.environ.get("REVIEW_STATE_PATH") or os.path.join(app.instance_path, 'review_state.db'),
+    claim_timeout=float(os.environ.get("REVIEW_CLAIM_TIMEOUT", 120)),
+    result_ttl=float(os.environ.get("REVIEW_RESULT_TTL", 600))
+)
+# How long /review waits for a fast result (cache hit, fallback) before returning the pending page
+REVIEW_INLINE_WAIT = float(os.environ.get("REVIEW_INLINE_WAIT", 0.2))
+
+# Opt-in cProfile runs for requests carrying PROFILE_SECRET; disabled (no hooks installed) when it is unset
+request_profiler = RequestProfiler(
+    os.environ.get("PROFILE_SECRET"),
+    os.environ.get("PROFILE_DIR") or os.path.join(app.instance_path, 'profiles'),
+    max_profiles=int(os.environ.get("PROFILE_MAX_FILES", 100))
+)
+
+
+# Request and template timing for /metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' in g:
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe('sentiment_http_request_duration_seconds', time.perf_counter() - g.request_start, endpoint=endpoint)
+        metrics.inc('sentiment_http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+def client_address():
+    """Address used as the rate-limit key"""
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+
+@app.before_request
+def admit_request():
+    """Apply admission control to scoring and review routes"""
+    try:
+        if MAX_REQUEST_QUEUE_AGE and request.endpoint in admission.endpoint_groups:
+            age = queue_age(request.headers.get('X-Request-Start'))
+            if age is not None and age > MAX_REQUEST_QUEUE_AGE:
+                raise Rejected(503, 'queue_age', 1)
+        g.admission_group = admission.admit(request.endpoint, client_address())
+    except Rejected as e:
+        metrics.inc('sentiment_requests_shed_total', group=admission.endpoint_groups.get(request.endpoint), reason=e.reason)
+        message = 'Too many requests' if e.status == 429 else 'Server busy, please retry'
+        response = jsonify({'error': message, 'reason': e.reason, 'retry_after': e.retry_after})
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+
+@app.teardown_request
+def release_admission(exc):
+    group = g.pop('admission_group', None)
+    if group is not None:
+        admission.release(group)
+
+
+def hold_admission(chunks):
+    """
+    Keep the request's admission slot until a streamed response is finished or closed
+    Teardown runs as soon as the view returns, which would free the slot before any of the stream is scored
+    """
+    group = g.pop('admission_group', None)
+
+    def held():
+        try:
+            yield from chunks
+        finally:
+            if group is not None:
+                admission.release(group)
+    return held()
+
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    g.render_start = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    if 'render_start' in g:
+        metrics.observe('sentiment_stage_duration_seconds', time.perf_counter() - g.pop('render_start'), stage='render')
+
+
+# Registered after the metrics timer so profiles cover the route itself
+request_profiler.init_app(app)
+
+
+# Helper functions for the current session's server-side comment history
+def get_history_id():
+    """Get or create the history ID for the current session"""
+    if 'history_id' not in session:
+        session['history_id'] = str(uuid.uuid4())
+    if 'comment_history' in session:
+        # Move history left over from cookie-backed sessions into the store
+        for comment in session.pop('comment_history'):
+            history_store.add(session['history_id'], comment)
+    return session['history_id']
+
+
+def get_comment_history(limit, offset=0):
+    """Get up to limit comments for the current session, oldest first"""
+    with time_stage('history'):
+        return history_store.recent(get_history_id(), limit, offset)[::-1]
+
+
+def get_comment_count():
+    """Get the number of comments in the current session's history"""
+    with time_stage('history'):
+        return history_store.count(get_history_id())
 
 
 def add_comment_to_history(comment_data):
     """Add a comment to the current session's history"""
-    comment_history = get_comment_history()
-    comment_data['id'] = len(comment_history) + 1
-    comment_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    comment_history.append(comment_data)
-    session['comment_history'] = comment_history
-    session.modified = True
-
-def analyze_sentiment(text):
+    with time_stage('history'):
+        comment = history_store.add(get_history_id(), comment_data)
+    comment_data['id'] = comment['id']
+    comment_data['timestamp'] = comment['timestamp']
+
+def analyze_ndjson_stream(stream, fields=None):
     """
-    Analyze sentiment using TextBlob
-    Returns polarity, subjectivity, and sentiment classification with additional metrics
+    Analyze newline-delimited JSON read incrementally from a binary stream
+    Each line is a JSON string or an object with 'text' (and optional 'id'); yields one NDJSON result line per input line
     """
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
-    
-    # Classify sentiment based on polarity
-    if polarity > 0:
-        sentiment = "Positive"
-    elif polarity < 0:
-        sentiment = "Negative"
-    else:
-        sentiment = "Neutral"
-    
-    # Calculate confidence level
-    confidence = abs(polarity)
-    if confidence > 0.7:
-        confidence_level = "Very High"
-    elif confidence > 0.3:
-        confidence_level = "High"
-    elif confidence > 0.1:
-        confidence_level = "Moderate"
-    else:
-        confidence_level = "Low"
-    
-    # Additional text analysis
-    word_count = len(text.split())
-    char_count = len(text)
-    
-    return {
-        'polarity': polarity,
-        'subjectivity': subjectivity,
-        'sentiment': sentiment,
-        'confidence': confidence,
-        'confidence_level': confidence_level,
-        'word_count': word_count,
-        'char_count': char_count,
-        'timestamp': datetime.now().isoformat()
-    }
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_STREAM_LINE_BYTES + 1)
+        if not line:
+            break
+        line_number += 1
+        
+        if len(line) > MAX_STREAM_LINE_BYTES and not line.endswith(b'\n'):
+            # Skip the rest of an oversized line without buffering it
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(MAX_STREAM_LINE_BYTES)
+            yield dumps({'line': line_number, 'error': f'Line too long (max {MAX_STREAM_LINE_BYTES} bytes)'}) + '\n'
+            continue
+        
+        if not line.strip():
+            continue
+        
+        result = {'line': line_number}
+        try:
+            item = json.loads(line)
+        except ValueError:
+            result['error'] = 'Invalid JSON'
+            yield dumps(result) + '\n'
+            continue
+        
+        if isinstance(item, dict):
+            if 'id' in item:
+                result['id'] = item['id']
+            text = item.get('text')
+        else:
+            text = item
+        
+        analysis, error = analyze_item(text, fields)
+        if error:
+            result['error'] = error
+        else:
+            result['data'] = analysis
+        try:
+            yield dumps(result) + '\n'
+        except (TypeError, ValueError) as e:
+            # A line whose echoed id cannot be encoded gets an error record; the stream carries on
+            logging.error(f"Error encoding stream line {line_number}: {e}")
+            yield dumps({'line': line_number, 'error': 'Result could not be encoded'}) + '\n'
 
 def improve_sentiment_with_ai(text):
     """
@@ -84,99 +309,150 @@ def improve_sentiment_with_ai(text):
     
     if not deepseek_api_key:
         # Fallback to minimal changes when no API key
+        metrics.inc('sentiment_improvements_total', source='fallback')
         return improve_sentiment_fallback(text)
     
-    try:
-        # DeepSeek API call
-        headers = {
-            'Authorization': f'Bearer {deepseek_api_key}',
-            'Content-Type': 'application/json'
-        }
-        
-        payload = {
-            'model': 'deepseek/deepseek-chat',
-            'messages': [
-                {
-                    'role': 'system',
-                    'content': 'You are an expert at improving the tone of text while preserving the original meaning exactly. Your task is to make negative or harsh comments more positive and constructive, but keep the core message and intent identical. Make minimal changes - only soften harsh language and improve tone. Do not add extra content or change the meaning. Respond with only the improved text, nothing else.'
-                },
-                {
-                    'role': 'user',
-                    'content': f'Please improve the tone of this text while keeping the exact same meaning: "{text}"'
-                }
-            ],
-            'max_tokens': 50,
-            'temperature': 0.2
-        }
-        
-        response = requests.post(
-            'https://openrouter.ai/api/v1/chat/completions',
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            improved_text = result['choices'][0]['message']['content'].strip()
-            
-            # Remove quotes if the AI added them
-            if improved_text.startswith('"') and improved_text.endswith('"'):
-                improved_text = improved_text[1:-1]
-            
-            original_analysis = analyze_sentiment(text)
-            
-            # Check if improvement actually made it more positive
-            improved_analysis = analyze_sentiment(improved_text)
-            
-            changes_made = []
-            if improved_text != text:
-                changes_made.append(("AI-enhanced tone", "DeepSeek improved positivity while preserving meaning"))
-            else:
-                changes_made.append(("No changes needed", "Original text was already well-written"))
-            
-            return {
-                'improved_text': improved_text,
-                'changes_made': changes_made,
-                'original_length': len(text),
-                'improved_length': len(improved_text),
-                'improvement_type': 'AI-Powered Enhancement',
-                'original_polarity': original_analysis['polarity'],
-                'explanation': 'DeepSeek AI improved tone and positivity while preserving original meaning'
+    cache_key = improvement_cache.make_key(text, DEEPSEEK_MODEL, IMPROVEMENT_PROMPT_VERSION)
+    cached = improvement_cache.get(cache_key)
+    if cached is not None:
+        metrics.inc('sentiment_improvements_total', source='cache')
+        return cached
+    
+    # Concurrent requests for the same text share one upstream call
+    improvement = improvement_flight.do(
+        cache_key,
+        lambda: request_ai_improvement(text, deepseek_api_key, cache_key),
+        recheck=lambda: improvement_cache.get(cache_key)
+    )
+    source = 'ai' if improvement['improvement_type'] == AI_IMPROVEMENT_TYPE else 'fallback'
+    metrics.inc('sentiment_improvements_total', source=source)
+    return improvement
+
+def improvement_request(text, deepseek_api_key):
+    """Return (payload, headers) for the DeepSeek improvement call"""
+    headers = {
+        'Authorization': f'Bearer {deepseek_api_key}',
+        'Content-Type': 'application/json'
+    }
+    
+    payload = {
+        'model': DEEPSEEK_MODEL,
+        'messages': [
+            {
+                'role': 'system',
+                'content': IMPROVEMENT_SYSTEM_PROMPT
+            },
+            {
+                'role': 'user',
+                'content': f'Please improve the tone of this text while keeping the exact same meaning: "{text}"'
             }
-        else:
-            logging.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-            return improve_sentiment_fallback(text)
-            
+        ],
+        'max_tokens': 50,
+        'temperature': 0.2
+    }
+    return payload, headers
+
+def ai_improvement(text, result):
+    """Build the improvement for text from a chat-completions result"""
+    improved_text = result['choices'][0]['message']['content'].strip()
+    
+    # Remove quotes if the AI added them
+    if improved_text.startswith('"') and improved_text.endswith('"'):
+        improved_text = improved_text[1:-1]
+    
+    changes_made = []
+    if improved_text != text:
+        changes_made.append(("AI-enhanced tone", "DeepSeek improved positivity while preserving meaning"))
+    else:
+        changes_made.append(("No changes needed", "Original text was already well-written"))
+    
+    return {
+        'improved_text': improved_text,
+        'changes_made': changes_made,
+        'original_length': len(text),
+        'improved_length': len(improved_text),
+        'improvement_type': AI_IMPROVEMENT_TYPE,
+        'original_polarity': AnalysisResult(text)['polarity'],
+        'explanation': 'DeepSeek AI improved tone and positivity while preserving original meaning'
+    }
+
+def request_ai_improvement(text, deepseek_api_key, cache_key):
+    """
+    Call DeepSeek for an improved version of text and cache the result
+    Falls back to minimal changes when the upstream call fails
+    """
+    try:
+        payload, headers = improvement_request(text, deepseek_api_key)
+        with time_stage('upstream'):
+            result = upstream_client.post_json(payload, headers=headers)
+        improvement = ai_improvement(text, result)
+        improvement_cache.set(cache_key, improvement)
+        return improvement
+    
+    except UpstreamError as e:
+        logging.error(f"DeepSeek API error: {e}")
+        return improve_sentiment_fallback(text)
     except Exception as e:
         logging.error(f"Error calling DeepSeek API: {e}")
         return improve_sentiment_fallback(text)
 
+async def improve_sentiment_with_ai_async(text):
+    """
+    Event-loop version of improve_sentiment_with_ai for async serving
+    The upstream call is awaited; cache lookups and scoring run in threads so the loop never blocks
+    """
+    deepseek_api_key = os.environ.get('DEEPSEEK_API_KEY')
+    
+    if not deepseek_api_key:
+        metrics.inc('sentiment_improvements_total', source='fallback')
+        return await asyncio.to_thread(improve_sentiment_fallback, text)
+    
+    cache_key = improvement_cache.make_key(text, DEEPSEEK_MODEL, IMPROVEMENT_PROMPT_VERSION)
+    cached = await asyncio.to_thread(improvement_cache.get, cache_key)
+    if cached is not None:
+        metrics.inc('sentiment_improvements_total', source='cache')
+        return cached
+    
+    improvement = await improvement_flight.ado(
+        cache_key,
+        lambda: request_ai_improvement_async(text, deepseek_api_key, cache_key)
+    )
+    source = 'ai' if improvement['improvement_type'] == AI_IMPROVEMENT_TYPE else 'fallback'
+    metrics.inc('sentiment_improvements_total', source=source)
+    return improvement
+
+async def request_ai_improvement_async(text, deepseek_api_key, cache_key):
+    """Event-loop version of request_ai_improvement"""
+    try:
+        payload, headers = improvement_request(text, deepseek_api_key)
+        with time_stage('upstream'):
+            result = await upstream_client.apost_json(payload, headers=headers)
+        improvement = await asyncio.to_thread(ai_improvement, text, result)
+        await asyncio.to_thread(improvement_cache.set, cache_key, improvement)
+        return improvement
+    
+    except UpstreamError as e:
+        logging.error(f"DeepSeek API error: {e}")
+    except Exception as e:
+        logging.error(f"Error calling DeepSeek API: {e}")
+    return await asyncio.to_thread(improve_sentiment_fallback, text)
+
 def improve_sentiment_fallback(text):
     """
     Fallback function for when DeepSeek API is not available
+    Rewrite spans refer to the text with surrounding whitespace stripped
     """
-    original_analysis = analyze_sentiment(text)
+    original_polarity = AnalysisResult(text)['polarity']
     
     # Very minimal improvements that don't change meaning drastically
     improved_text = text.strip()
     changes_made = []
     
     # Only make very minor, natural adjustments for extremely negative text
-    if original_analysis['polarity'] < -0.5:  # Only for very negative text
-        simple_replacements = {
-            r'\bterrible\b': 'not great',
-            r'\bawful\b': 'not good',
-            r'\bhate\b': 'really dislike',
-            r'\bstupid\b': 'frustrating',
-            r'\buseless\b': 'not helpful'
-        }
-        
-        for pattern, replacement in simple_replacements.items():
-            if re.search(pattern, improved_text, re.IGNORECASE):
-                improved_text = re.sub(pattern, replacement, improved_text, flags=re.IGNORECASE)
-                changes_made.append(("Softened harsh language", "More diplomatic tone"))
-                break
+    rewrites = []
+    if original_polarity < FALLBACK_REWRITE_POLARITY:
+        improved_text, rewrites = rewrite_rules.apply(improved_text)
+        changes_made.extend((rewrite['original'], rewrite['replacement']) for rewrite in rewrites)
     
     # If no changes were made, leave it as is
     if not changes_made:
@@ -188,7 +464,8 @@ def improve_sentiment_fallback(text):
         'original_length': len(text),
         'improved_length': len(improved_text),
         'improvement_type': 'Minimal Adjustment',
-        'original_polarity': original_analysis['polarity'],
+        'original_polarity': original_polarity,
+        'rewrites': rewrites,
         'explanation': 'Minor adjustments to tone while preserving original meaning and intent'
     }
 
@@ -198,10 +475,58 @@ def improve_sentiment(text):
     """
     return improve_sentiment_with_ai(text)
 
+def run_review(job_key, text):
+    """Generate improvement suggestions and score the improved text (runs on the review worker pool)"""
+    improvement = improve_sentiment(text)
+    improved_analysis = analyze_sentiment(improvement['improved_text'])
+    review_state.finish(job_key, (improvement, improved_analysis))
+    return improvement, improved_analysis
+
+async def run_review_async(job_key, text):
+    """Event-loop version of run_review, used when review_jobs runs on the async server's loop"""
+    improvement = await improve_sentiment_with_ai_async(text)
+    improved_analysis = await asyncio.to_thread(analyze_sentiment, improvement['improved_text'])
+    await asyncio.to_thread(review_state.finish, job_key, (improvement, improved_analysis))
+    return improvement, improved_analysis
+
+def fallback_review(job_key, text):
+    """Review with the rule-based suggestions inline, recording the result for every worker"""
+    review_jobs.discard(job_key)
+    metrics.inc('sentiment_improvements_total', source='fallback')
+    improvement = improve_sentiment_fallback(text)
+    result = (improvement, analyze_sentiment(improvement['improved_text']))
+    review_state.finish(job_key, result)
+    return {'status': 'done', 'result': result}
+
+def start_review(history_id, comment):
+    """
+    Queue a review for a comment and wait briefly for it
+    Returns the job status; falls back to rule-based suggestions inline when the queue is full or the job failed
+    """
+    job_key = (history_id, comment['id'])
+    if review_jobs.status(job_key)['status'] == 'missing':
+        # Another worker may already be running or have finished this review
+        shared = review_state.claim(job_key)
+        if shared is not None:
+            return shared
+    try:
+        review_jobs.submit(job_key, run_review if review_jobs.loop is None else run_review_async, job_key, comment['text'])
+        job = review_jobs.wait(job_key, REVIEW_INLINE_WAIT)
+    except QueueFullError:
+        logging.warning("Review queue full, using fallback suggestions")
+        job = {'status': 'failed'}
+    
+    if job['status'] == 'failed':
+        job = fallback_review(job_key, comment['text'])
+    return job
+
 @app.route('/')
 def index():
     """Homepage with text input form"""
-    return render_template('index.html', comment_history=get_comment_history())
+    return render_template('index.html',
+                         max_text_length=MAX_FORM_TEXT_LENGTH,
+                         comment_history=get_comment_history(3),
+                         comment_count=get_comment_count())
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -214,15 +539,18 @@ def analyze():
         return redirect(url_for('index'))
     
     # Check text length
-    if len(text) > 5000:
-        flash('Text is too long. Please limit to 5000 characters.', 'error')
+    if len(text) > MAX_FORM_TEXT_LENGTH:
+        flash(f'Text is too long. Please limit to {MAX_FORM_TEXT_LENGTH} characters.', 'error')
         return redirect(url_for('index'))
     
     try:
-        # Perform sentiment analysis
-        analysis = analyze_sentiment(text)
+        # Perform sentiment analysis; long texts are scored per sentence and length-weighted
+        if len(text) > MAX_TEXT_LENGTH:
+            analysis, _sentences = analyze_document(text)
+        else:
+            analysis = AnalysisResult(text)
         
-        # Store in session-based history
+        # Store in server-side history
         comment_entry = {
             'text': text,
             'polarity': analysis['polarity'],
@@ -239,94 +567,488 @@ def analyze():
                              polarity=analysis['polarity'],
                              subjectivity=analysis['subjectivity'],
                              sentiment=analysis['sentiment'],
-                             comment_history=get_comment_history())
+                             sentence_count=analysis.get('sentence_count'),
+                             comment_history=get_comment_history(5),
+                             comment_count=get_comment_count())
     
     except Exception as e:
         logging.error(f"Error analyzing sentiment: {e}")
         flash('An error occurred while analyzing the text. Please try again.', 'error')
         return redirect(url_for('index'))
 
+def api_response(payload, status=200):
+    """
+    Encode an API response in the format the client asked for (Accept header or ?format=json|msgpack)
+    An explicit ?format= that cannot be produced gets a 406
+    """
+    fmt = choose_format(request.accept_mimetypes, request.args.get('format'))
+    if fmt is None:
+        payload, status, fmt = {'error': 'Requested format not available'}, 406, 'json'
+    body, mimetype = encode(payload, fmt)
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+def request_payload():
+    """Decode a JSON or MessagePack request body, or return None"""
+    if request.mimetype in MSGPACK_MIMETYPES:
+        return decode_msgpack(request.get_data())
+    return request.get_json(silent=True)
+
+def requested_fields(data=None):
+    """
+    Fields selected with ?fields= or a "fields" entry in the request body
+    Returns None for all fields; raises ValueError for unknown ones
+    """
+    value = request.args.get('fields')
+    if value is None and isinstance(data, dict):
+        value = data.get('fields')
+    return parse_fields(value)
+
 @app.route('/api/analyze', methods=['POST'])
 def api_analyze():
-    """API endpoint for sentiment analysis"""
+    """
+    API endpoint for sentiment analysis
+    ?fields=polarity,sentiment returns only those fields; scoring is skipped when no score-derived field is requested
+    """
     try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
+        data = request_payload()
+        if not isinstance(data, dict) or 'text' not in data:
+            return api_response({'error': 'No text provided'}, 400)
+        
+        try:
+            fields = requested_fields(data)
+        except ValueError as e:
+            return api_response({'error': str(e)}, 400)
+        
+        if not isinstance(data['text'], str):
+            return api_response({'error': 'Text must be a string'}, 400)
         
         text = data['text'].strip()
         if not text:
-            return jsonify({'error': 'Empty text provided'}), 400
+            return api_response({'error': 'Empty text provided'}, 400)
         
-        if len(text) > 5000:
-            return jsonify({'error': 'Text too long (max 5000 characters)'}), 400
+        if len(text) > MAX_TEXT_LENGTH:
+            return api_response({'error': f'Text too long (max {MAX_TEXT_LENGTH} characters, use /api/analyze/document for longer texts)'}, 400)
         
         # Perform sentiment analysis
-        analysis = analyze_sentiment(text)
+        analysis = analyze_sentiment(text, fields)
         
-        return jsonify({
+        return api_response({
             'success': True,
             'data': analysis
         })
     
     except Exception as e:
         logging.error(f"API Error analyzing sentiment: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return api_response({'error': 'Internal server error'}, 500)
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    """
+    API endpoint for analyzing many texts in a single request
+    ?layout=columnar returns one array per field instead of one object per text; ?fields= selects fields as for /api/analyze
+    """
+    try:
+        data = request_payload()
+        if not isinstance(data, dict) or 'texts' not in data:
+            return api_response({'error': 'No texts provided'}, 400)
+        
+        texts = data['texts']
+        if not isinstance(texts, list):
+            return api_response({'error': 'texts must be a list'}, 400)
+        
+        if not texts:
+            return api_response({'error': 'Empty batch provided'}, 400)
+        
+        if len(texts) > MAX_BATCH_SIZE:
+            return api_response({'error': f'Batch too large (max {MAX_BATCH_SIZE} texts)'}, 400)
+        
+        try:
+            fields = requested_fields(data)
+        except ValueError as e:
+            return api_response({'error': str(e)}, 400)
+        
+        results = analyze_sentiment_batch(texts, fields)
+        errors = sum(1 for r in results if 'error' in r)
+        
+        if request.args.get('layout') == 'columnar':
+            return api_response(dict(to_columnar(results, fields), success=True, count=len(results), errors=errors))
+        
+        return api_response({
+            'success': True,
+            'count': len(results),
+            'errors': errors,
+            'results': results
+        })
+    
+    except Exception as e:
+        logging.error(f"API Error analyzing batch: {e}")
+        return api_response({'error': 'Internal server error'}, 500)
+
+@app.route('/api/analyze/stream', methods=['POST'])
+def api_analyze_stream():
+    """API endpoint that analyzes an NDJSON request body and streams NDJSON results back as it reads"""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(
+        stream_with_context(hold_admission(analyze_ndjson_stream(request.stream, fields))),
+        mimetype='application/x-ndjson'
+    )
+
+def analyze_document_stream(chunks, include_sentences):
+    """
+    Score a document read incrementally and yield NDJSON
+    One line per sentence (unless include_sentences is false), then a final line with the document summary
+    """
+    aggregate = DocumentAggregate()
+    read = 0
+    
+    def limited(chunks):
+        nonlocal read
+        for chunk in chunks:
+            read += len(chunk)
+            if read > MAX_DOCUMENT_LENGTH:
+                raise ValueError(f'Document too long (max {MAX_DOCUMENT_LENGTH} characters)')
+            yield chunk
+    
+    try:
+        for sentence in score_document(limited(chunks), aggregate=aggregate):
+            if include_sentences:
+                yield dumps({'sentence': sentence}) + '\n'
+    except ValueError as e:
+        yield dumps({'error': str(e)}) + '\n'
+        return
+    except Exception as e:
+        logging.error(f"Error analyzing document: {e}")
+        yield dumps({'error': 'Internal server error'}) + '\n'
+        return
+    yield dumps({'document': aggregate.result()}) + '\n'
+
+@app.route('/api/analyze/document', methods=['POST'])
+def api_analyze_document():
+    """
+    API endpoint for long documents: a text/plain body (read incrementally) or JSON {"text": ...}
+    Streams per-sentence scores with character spans, then the length-weighted document score
+    """
+    include_sentences = request.args.get('sentences', '1') not in ('0', 'false')
+    if request.is_json:
+        data = request.get_json(silent=True)
+        text = data.get('text') if isinstance(data, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            return jsonify({'error': 'No text provided'}), 400
+        chunks = [text]
+    else:
+        chunks = read_text_chunks(request.stream)
+    
+    return Response(
+        stream_with_context(hold_admission(analyze_document_stream(chunks, include_sentences))),
+        mimetype='application/x-ndjson'
+    )
+
+@app.route('/api/analyze/live', methods=['POST'])
+def api_analyze_live():
+    """
+    API endpoint for analysis as the user types
+    Send {"text": ...} to start (or resync) a session, then {"session", "version", "diff": {"start", "end", "text"}}
+    for each edit; only sentences touched by the edit are re-scored and returned, with the offset shift of those after
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No edit provided'}), 400
+    
+    session_id = data.get('session')
+    try:
+        if 'text' in data:
+            if not isinstance(data['text'], str):
+                return jsonify({'error': 'text must be a string'}), 400
+            document = live_sessions.get(session_id) if session_id else None
+            if document is None:
+                session_id, document = live_sessions.create()
+            with document.lock:
+                change = document.set_text(data['text'], MAX_FORM_TEXT_LENGTH)
+        else:
+            diff = data.get('diff')
+            if not isinstance(diff, dict) or not isinstance(diff.get('text', ''), str):
+                return jsonify({'error': 'No diff provided'}), 400
+            document = live_sessions.get(session_id, data.get('version')) if session_id else None
+            if document is None:
+                raise LiveSessionError('Unknown or expired live session')
+            with document.lock:
+                change = document.apply_diff(data.get('version'), diff.get('start'), diff.get('end'),
+                                              diff.get('text', ''), MAX_FORM_TEXT_LENGTH)
+    except LiveSessionError as e:
+        # The client resends the full text to resynchronize
+        return jsonify({'error': str(e), 'resync': True}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    first, old_end, new_end, shift = change
+    with document.lock:
+        live_sessions.touch(session_id, document)
+        return jsonify({
+            'success': True,
+            'session': session_id,
+            'version': document.version,
+            'sentence_count': len(document.sentences),
+            # Sentences first..new_end-1 replace the previous first..old_end-1; later ones move by shift characters
+            'changed': [document.sentence(index) for index in range(first, new_end)],
+            'replaced': [first, old_end],
+            'shift': shift,
+            'document': document.summary()
+        })
 
 @app.route('/review/<int:comment_id>')
 def review_comment(comment_id):
     """Review a specific comment and suggest improvements"""
     try:
-        # Find the comment in session history
-        comment_history = get_comment_history()
-        comment = None
-        for c in comment_history:
-            if c['id'] == comment_id:
-                comment = c
-                break
+        # Find the comment in the session's history
+        history_id = get_history_id()
+        comment = history_store.get(history_id, comment_id)
         
         if not comment:
             flash('Comment not found.', 'error')
             return redirect(url_for('index'))
         
-        # Generate improvement suggestions
-        improvement = improve_sentiment(comment['text'])
+        # Generate improvement suggestions in the background; the pending page polls until they are ready
+        job = start_review(history_id, comment)
+        if job['status'] == 'pending':
+            return render_template('review_pending.html',
+                                 original_comment=comment,
+                                 status_url=url_for('api_review_status', comment_id=comment_id))
         
-        # Analyze the improved text
-        improved_analysis = analyze_sentiment(improvement['improved_text'])
+        improvement, improved_analysis = job['result']
         
         return render_template('review.html',
                              original_comment=comment,
                              improvement=improvement,
-                             improved_analysis=improved_analysis,
-                             comment_history=comment_history)
+                             improved_analysis=improved_analysis)
     
     except Exception as e:
         logging.error(f"Error reviewing comment {comment_id}: {e}")
         flash('An error occurred while reviewing the comment.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/api/review/<int:comment_id>')
+def api_review_status(comment_id):
+    """API endpoint to poll a background review; 'missing' means /review/<id> must be reloaded to start it"""
+    history_id = get_history_id()
+    comment = history_store.get(history_id, comment_id)
+    if not comment:
+        return jsonify({'error': 'Comment not found'}), 404
+    
+    job_key = (history_id, comment_id)
+    job = review_jobs.status(job_key)
+    if job['status'] == 'failed':
+        job = fallback_review(job_key, comment['text'])
+    elif job['status'] == 'missing':
+        # Running or finished on another worker, or never started
+        job = review_state.status(job_key)
+    
+    response = {'success': True, 'status': job['status']}
+    if job['status'] == 'done':
+        improvement, improved_analysis = job['result']
+        response['data'] = {
+            'improvement': improvement,
+            'improved_analysis': improved_analysis
+        }
+    return jsonify(response)
+
 @app.route('/history')
 def view_history():
-    """View all comment history"""
-    return render_template('history.html', comment_history=get_comment_history())
+    """View comment history, one page at a time"""
+    history_id = get_history_id()
+    page = max(request.args.get('page', 1, type=int), 1)
+    with time_stage('history'):
+        summary = history_store.summary(history_id)
+        comment_count = summary['count']
+        page_count = max((comment_count + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE, 1)
+        page = min(page, page_count)
+        comments = history_store.recent(history_id, HISTORY_PAGE_SIZE, (page - 1) * HISTORY_PAGE_SIZE)
+    
+    return render_template('history.html',
+                         comment_history=comments,
+                         comment_count=comment_count,
+                         sentiment_counts=summary['sentiment_counts'],
+                         mean_polarity=summary['mean_polarity'],
+                         mean_subjectivity=summary['mean_subjectivity'],
+                         page=page,
+                         page_count=page_count)
+
+@app.route('/api/history')
+def api_history():
+    """API endpoint for the comment history, newest first, paged with an opaque cursor"""
+    history_id = get_history_id()
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), MAX_HISTORY_API_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    if cursor is not None and not cursor.isdigit():
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    with time_stage('history'):
+        comments = history_store.before(history_id, limit + 1, int(cursor) if cursor else None)
+        response = {'success': True, 'data': comments[:limit]}
+        # The next page starts below the last comment returned
+        response['next_cursor'] = str(comments[limit - 1]['id']) if len(comments) > limit else None
+        if cursor is None:
+            response['summary'] = history_store.summary(history_id)
+    return jsonify(response)
+
+@app.route('/api/history/summary')
+def api_history_summary():
+    """API endpoint for comment count, sentiment counts and mean scores"""
+    with time_stage('history'):
+        summary = history_store.summary(get_history_id())
+    return jsonify({'success': True, 'data': summary})
+
+def parse_rollup_time(value):
+    """Parse an ISO 8601 time; aware times are converted to the server's local time, which rollups are kept in"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+def rollup_response(scope):
+    """Serve ?granularity=minute|hour|day&start=&end= from the rollups of scope, one summary per bucket"""
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ROLLUP_GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(ROLLUP_GRANULARITIES)}"}), 400
+    step = ROLLUP_GRANULARITIES[granularity]
+    try:
+        end = parse_rollup_time(request.args['end']) if request.args.get('end') else datetime.now()
+        start = (parse_rollup_time(request.args['start']) if request.args.get('start')
+                 else bucket_start(end, granularity) - step * (DEFAULT_ROLLUP_BUCKETS - 1))
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 times'}), 400
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+    # Buckets run from the one containing start, so count from its aligned start
+    if (end - bucket_start(start, granularity)) / step > MAX_ROLLUP_BUCKETS:
+        return jsonify({'error': f'Range too large (max {MAX_ROLLUP_BUCKETS} {granularity} buckets)'}), 400
+
+    with time_stage('history'):
+        buckets = history_store.rollups(scope, granularity, start, end)
+    return jsonify({
+        'success': True,
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'data': buckets
+    })
+
+@app.route('/api/history/rollups')
+def api_history_rollups():
+    """API endpoint for this history's sentiment totals per minute, hour or day over a time range"""
+    return rollup_response(get_history_id())
+
+@app.route('/api/rollups')
+def api_rollups():
+    """API endpoint for sentiment totals across all histories per minute, hour or day over a time range"""
+    return rollup_response(GLOBAL_SCOPE)
+
+@app.route('/history/export')
+def export_history():
+    """Download the full comment history as JSON"""
+    history_id = get_history_id()
+    comments = history_store.recent(history_id, history_store.count(history_id))[::-1]
+    response = jsonify(comments)
+    response.headers['Content-Disposition'] = (
+        f"attachment; filename=sentiment_history_{datetime.now().strftime('%Y-%m-%d')}.json"
+    )
+    return response
 
 @app.route('/clear_history', methods=['POST'])
 def clear_history():
     """Clear all comment history"""
-    session['comment_history'] = []
-    session.modified = True
+    history_id = get_history_id()
+    history_store.clear(history_id)
+    # Reviews are keyed by comment ID, so none may outlive the comments they belong to
+    review_jobs.forget(history_id)
+    review_state.forget(history_id)
     flash('Comment history cleared successfully.', 'success')
     return redirect(url_for('index'))
 
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Analysis cache hit/miss/eviction counters"""
+    return jsonify({
+        'success': True,
+        'data': analysis_cache.stats()
+    })
+
+@app.route('/api/upstream/stats')
+def upstream_stats():
+    """AI upstream call counters and circuit breaker state"""
+    return jsonify({
+        'success': True,
+        'data': dict(upstream_client.stats(), cache=improvement_cache.stats(), singleflight=improvement_flight.stats())
+    })
+
+@app.route('/api/admission/stats')
+def admission_stats():
+    """Running and waiting requests per route group"""
+    return jsonify({
+        'success': True,
+        'data': admission.stats()
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, stage and improvement metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def check_profile_access():
+    """Return an error response unless profiling is enabled and the request carries the profiling secret"""
+    if not request_profiler.enabled:
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    if not request_profiler.authorized(request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """List recently saved request profiles (requires the profiling secret)"""
+    error = check_profile_access()
+    if error:
+        return error
+    return jsonify({
+        'success': True,
+        'data': request_profiler.list_profiles(request.args.get('limit', 50, type=int))
+    })
+
+@app.route('/admin/profiles/<profile_id>')
+def download_profile(profile_id):
+    """Download one saved profile in pstats format (requires the profiling secret)"""
+    error = check_profile_access()
+    if error:
+        return error
+    path = request_profiler.profile_path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=profile_id)
+
 @app.route('/health')
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint; reports 503 until warm-up has finished"""
+    if not startup.ready:
+        return jsonify({
+            'status': 'starting' if startup.state in ('cold', 'warming') else 'unhealthy',
+            'warmup': startup.state,
+            'timestamp': datetime.now().isoformat(),
+            'service': 'sentiment-analysis-tool'
+        }), 503
     return jsonify({
         'status': 'healthy',
+        'warmup': startup.state,
+        'warmup_seconds': startup.timings.get('total'),
         'timestamp': datetime.now().isoformat(),
         'service': 'sentiment-analysis-tool'
     })
 
+# Load the lexicon, scoring tables and templates up front (WARM_STARTUP=preload|background|off)
+startup = WarmUp()
+startup.start(app)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,256 @@
+"""
+Sentiment Analysis Tool - Metrics
+Request and stage counters and latency histograms in Prometheus text format, aggregated across worker processes
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Snapshot holding the totals of workers that have exited
+RETIRED_SNAPSHOT = 'retired.json'
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms kept in memory per process
+    With directory set, each process periodically writes a snapshot there and render() sums all snapshots,
+    so a scrape hitting any gunicorn worker sees totals for every worker
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}  # name -> (type, help, buckets)
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One snapshot write at a time: every writer shares the .tmp path
+        self._pid = os.getpid()
+        self._last_flush = 0.0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def counter(self, name, help_text):
+        """Declare a counter"""
+        self._metrics[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """Declare a histogram with the given upper bucket bounds"""
+        self._metrics[name] = ('histogram', help_text, tuple(buckets))
+
+    def _check_fork(self):
+        """Drop values inherited from the parent so they are not counted once per worker (lock held)"""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._counters.clear()
+            self._histograms.clear()
+            self._last_flush = 0.0
+            self._flush_lock = threading.Lock()  # Could have been held by a parent thread at fork
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._flush_if_due()
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram"""
+        buckets = self._metrics[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0] * (len(buckets) + 2)
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                values[index] += 1
+            values[-2] += 1
+            values[-1] += value
+        self._flush_if_due()
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Observe the duration of the with-block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, list(values)] for (name, labels), values in self._histograms.items()]
+            }
+
+    def _flush_if_due(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            # Skipped when another thread is already writing; the next due request picks up these values
+            lock = self._flush_lock
+            if lock.acquire(blocking=False):
+                try:
+                    self._write_snapshot()
+                finally:
+                    lock.release()
+
+    def flush(self):
+        """Write this process's values to the shared directory"""
+        if not self.directory:
+            return
+        with self._flush_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Replace this process's snapshot file (flush lock held)"""
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self._snapshot(), f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logging.error(f"Failed to write metrics snapshot: {e}")
+
+    def clear(self):
+        """Remove every snapshot in the shared directory (the gunicorn master calls this at startup)"""
+        if not self.directory:
+            return
+        for filename in os.listdir(self.directory):
+            if filename.endswith(('.json', '.tmp')):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def retire(self, pid):
+        """
+        Fold an exited worker's snapshot into the retired totals and remove it (the gunicorn master calls this)
+        Totals stay monotonic, and a new worker that reuses the PID starts its own snapshot from zero
+        """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{pid}.json')
+        retired_path = os.path.join(self.directory, RETIRED_SNAPSHOT)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        retired = [snapshot]
+        try:
+            with open(retired_path) as f:
+                retired.append(json.load(f))
+        except (OSError, ValueError):
+            pass
+        counters, histograms = self._sum(retired)
+        try:
+            with open(retired_path + '.tmp', 'w') as f:
+                json.dump({
+                    'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                    'histograms': [[name, labels, values] for (name, labels), values in histograms.items()]
+                }, f)
+            os.replace(retired_path + '.tmp', retired_path)
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Failed to retire metrics snapshot for worker {pid}: {e}")
+
+    @staticmethod
+    def _sum(snapshots):
+        """Sum counter and histogram values over snapshots"""
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                total = histograms.get(key)
+                if total is None or len(total) != len(values):
+                    histograms[key] = list(values)
+                else:
+                    histograms[key] = [a + b for a, b in zip(total, values)]
+        return counters, histograms
+
+    def _collect(self):
+        """Return counter and histogram totals, summed over every process snapshot"""
+        if not self.directory:
+            snapshots = [self._snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for filename in os.listdir(self.directory):
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, filename)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Being replaced or removed by its worker
+        return self._sum(snapshots)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        counters, histograms = self._collect()
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, values):
+                    cumulative += count
+                    le = (('le', repr(float(bound))),)
+                    lines.append(f'{name}_bucket{_format_labels(labels + le)} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {values[-2]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {float(values[-1])!r}')
+                lines.append(f'{name}_count{_format_labels(labels)} {values[-2]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry; METRICS_DIR turns on aggregation across gunicorn workers
+registry = MetricsRegistry(
+    directory=os.environ.get('METRICS_DIR'),
+    flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+)
+registry.counter('sentiment_http_requests_total', 'HTTP requests by endpoint, method and status')
+registry.histogram('sentiment_http_request_duration_seconds', 'HTTP request latency by endpoint')
+registry.histogram('sentiment_stage_duration_seconds', 'Latency of internal stages: scoring, history, render, upstream')
+registry.counter('sentiment_improvements_total', 'Tone improvements by source (ai, cache, fallback)')
+registry.counter('sentiment_requests_shed_total', 'Requests rejected by admission control, by route group and reason')
+registry.counter('sentiment_singleflight_calls_total', 'Coalesced calls by outcome: executions, coalesced in a worker, coalesced across workers')
+
+
+def time_stage(stage):
+    """Context manager timing one internal stage"""
+    return registry.time('sentiment_stage_duration_seconds', stage=stage)
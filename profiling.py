@@ -0,0 +1,110 @@
+"""
+Sentiment Analysis Tool - Per-Request Profiling
+Runs individual requests under cProfile when they carry the profiling secret and saves the results
+"""
+
+import cProfile
+import hmac
+import os
+import re
+import time
+import logging
+from datetime import datetime
+
+from flask import g, request
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile hooks for a Flask app
+    A request is profiled only when its X-Profile header or ?profile= parameter matches the secret;
+    without a secret no hooks are installed, so normal requests pay nothing
+    """
+
+    def __init__(self, secret, directory, max_profiles=100):
+        self.secret = secret
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    @property
+    def enabled(self):
+        return bool(self.secret)
+
+    def init_app(self, app):
+        """Install the request hooks when profiling is enabled"""
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def authorized(self, value):
+        """Return True if value matches the profiling secret"""
+        return self.enabled and bool(value) and hmac.compare_digest(value.encode('utf-8'), self.secret.encode('utf-8'))
+
+    def _start(self):
+        if self.authorized(request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)):
+            g.profiler = cProfile.Profile()
+            g.profile_start = time.perf_counter()
+            g.profiler.enable()
+
+    def _finish(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - g.pop('profile_start')) * 1000
+        name = '{}-{}-{:.0f}ms.prof'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f'),
+            _UNSAFE_CHARS.sub('_', request.endpoint or 'unmatched'),
+            elapsed_ms
+        )
+        try:
+            profiler.dump_stats(os.path.join(self.directory, name))
+            self._prune()
+            response.headers['X-Profile-Id'] = name
+        except OSError as e:
+            logging.error(f"Failed to save request profile: {e}")
+        return response
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_profiles"""
+        for name in self._names()[self.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _names(self):
+        """Profile file names, newest first"""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.prof')]
+        except OSError:
+            return []
+        return sorted(names, reverse=True)
+
+    def list_profiles(self, limit=50):
+        """Return metadata for the most recent profiles"""
+        profiles = []
+        for name in self._names()[:limit]:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            profiles.append({
+                'id': name,
+                'size': stat.st_size,
+                'created': datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
+        return profiles
+
+    def profile_path(self, profile_id):
+        """Return the path of a saved profile, or None if it does not exist"""
+        if profile_id != os.path.basename(profile_id) or not profile_id.endswith('.prof'):
+            return None
+        path = os.path.join(self.directory, profile_id)
+        return path if os.path.isfile(path) else None
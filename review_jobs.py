@@ -0,0 +1,221 @@
+"""
+Sentiment Analysis Tool - Background Review Jobs
+Runs slow AI reviews on a bounded in-process worker pool (or an event loop) so requests return immediately,
+with claims and finished results shared by all workers through SQLite
+"""
+
+import asyncio
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlite_store import SQLiteFile
+
+
+class QueueFullError(Exception):
+    """Too many review jobs are already waiting"""
+
+
+class ReviewJobQueue:
+    """
+    Bounded worker pool whose jobs are looked up by key (e.g. history ID + comment ID)
+    Once use_event_loop() is called, coroutine functions are run as tasks on that loop instead of on a thread
+    """
+
+    def __init__(self, max_workers=4, max_pending=32, result_ttl=600.0, max_results=1000):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='review')
+        self._jobs = OrderedDict()  # key -> (future, finished_at or None)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.loop = None
+        atexit.register(self.shutdown)
+
+    def use_event_loop(self, loop, max_pending=None):
+        """Run coroutine jobs on loop from now on, optionally with a larger pending limit"""
+        with self._lock:
+            self.loop = loop
+            if max_pending is not None:
+                self.max_pending = max_pending
+
+    def submit(self, key, fn, *args):
+        """
+        Start fn(*args) in the background unless a job for key already exists
+        Raises QueueFullError when max_pending jobs are already queued or running
+        """
+        with self._lock:
+            self._expire()
+            if key in self._jobs:
+                return
+            if self._closed:
+                raise QueueFullError('Review queue is shut down')
+            if self._pending >= self.max_pending:
+                raise QueueFullError('Review queue is full')
+            if asyncio.iscoroutinefunction(fn):
+                if self.loop is None:
+                    raise RuntimeError('Coroutine jobs need use_event_loop() first')
+                future = asyncio.run_coroutine_threadsafe(fn(*args), self.loop)
+            else:
+                future = self._executor.submit(fn, *args)
+            self._jobs[key] = [future, None]
+            self._pending += 1
+        future.add_done_callback(lambda f: self._finished(key))
+
+    def _finished(self, key):
+        with self._lock:
+            self._pending -= 1
+            job = self._jobs.get(key)
+            if job is not None:
+                job[1] = time.monotonic()
+
+    def _expire(self):
+        """Drop finished jobs past their TTL, and the oldest finished ones past max_results (lock held)"""
+        now = time.monotonic()
+        finished = [key for key, (_future, finished_at) in self._jobs.items() if finished_at is not None]
+        expired = [key for key in finished if now - self._jobs[key][1] > self.result_ttl]
+        excess = len(self._jobs) - len(expired) - self.max_results
+        if excess > 0:
+            expired += [key for key in finished if key not in expired][:excess]
+        for key in expired:
+            del self._jobs[key]
+
+    def status(self, key):
+        """
+        Return {'status': 'missing' | 'pending' | 'done' | 'failed'} plus 'result' once done
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None:
+            return {'status': 'missing'}
+        future = job[0]
+        if not future.done():
+            return {'status': 'pending'}
+        if future.cancelled() or future.exception() is not None:
+            if not future.cancelled():
+                logging.error(f"Review job {key} failed: {future.exception()}")
+            return {'status': 'failed'}
+        return {'status': 'done', 'result': future.result()}
+
+    def wait(self, key, timeout):
+        """Wait up to timeout seconds for a job to finish, then return its status"""
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is not None:
+            wait([job[0]], timeout=timeout)
+        return self.status(key)
+
+    def discard(self, key):
+        """Forget a finished job so it can be resubmitted"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job[0].done():
+                del self._jobs[key]
+
+    def forget(self, scope):
+        """Forget every job whose key starts with scope (e.g. a cleared history ID); running jobs still finish"""
+        with self._lock:
+            for key in [key for key in self._jobs if key[0] == scope]:
+                del self._jobs[key]
+
+    def depth(self):
+        """Number of jobs queued or running"""
+        return self._pending
+
+    def shutdown(self):
+        """Cancel queued jobs and wait for running ones to finish"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class SharedReviewState:
+    """
+    Review claims and finished results in a SQLite file shared by every worker on the host
+    A worker claims a review before running it, so a poll or reload that lands on another worker neither starts a
+    second review nor loses the finished one
+    """
+
+    def __init__(self, path, claim_timeout=120.0, result_ttl=600.0):
+        self.path = path
+        self.claim_timeout = claim_timeout  # A claim older than this belongs to a worker that died mid-review
+        self.result_ttl = result_ttl
+        self._db = SQLiteFile(path, schema=(
+            'CREATE TABLE IF NOT EXISTS reviews ('
+            'key TEXT PRIMARY KEY, status TEXT NOT NULL, result TEXT, updated_at REAL NOT NULL)',
+        ), autocommit=True)  # Claims take the write lock up front
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key)
+
+    def _decode(self, row, now):
+        """Status dict for a stored row, or None when the row has expired"""
+        status, result, updated_at = row
+        if status == 'pending' and now - updated_at < self.claim_timeout:
+            return {'status': 'pending'}
+        if status == 'done' and now - updated_at < self.result_ttl:
+            return {'status': 'done', 'result': tuple(json.loads(result))}
+        return None
+
+    def claim(self, key):
+        """
+        Claim a review for this worker
+        Returns None when the caller should run it, otherwise the status of the review claimed or finished elsewhere
+        """
+        now = time.time()
+        try:
+            conn = self._db.connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT status, result, updated_at FROM reviews WHERE key = ?',
+                                   (self._key(key),)).fetchone()
+                existing = self._decode(row, now) if row is not None else None
+                if existing is None:
+                    conn.execute('DELETE FROM reviews WHERE updated_at < ?', (now - max(self.result_ttl, self.claim_timeout),))
+                    conn.execute('INSERT OR REPLACE INTO reviews (key, status, result, updated_at) VALUES (?, ?, NULL, ?)',
+                                 (self._key(key), 'pending', now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logging.error(f"Review claim failed, running the review here: {e}")
+            return None
+        return existing
+
+    def finish(self, key, result):
+        """Record a finished review's result for every worker"""
+        try:
+            self._db.connection().execute(
+                'INSERT OR REPLACE INTO reviews (key, status, result, updated_at) VALUES (?, ?, ?, ?)',
+                (self._key(key), 'done', json.dumps(result), time.time())
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Recording review {key} failed: {e}")
+
+    def forget(self, scope):
+        """Delete every claim and result whose key starts with scope (e.g. a cleared history ID)"""
+        try:
+            self._db.connection().execute("DELETE FROM reviews WHERE json_extract(key, '$[0]') = ?", (scope,))
+        except sqlite3.Error as e:
+            logging.error(f"Forgetting reviews for {scope} failed: {e}")
+
+    def status(self, key):
+        """Return {'status': 'missing' | 'pending' | 'done'} plus 'result' once done"""
+        try:
+            row = self._db.connection().execute('SELECT status, result, updated_at FROM reviews WHERE key = ?',
+                                              (self._key(key),)).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Review status lookup failed: {e}")
+            return {'status': 'missing'}
+        return (self._decode(row, time.time()) if row is not None else None) or {'status': 'missing'}
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Rewrite Rules
+Applies a softening lexicon loaded from a data file in one pass over the text, reporting the span of every rewrite
+
+Usage:
+    python rewrite_rules.py [rules.json] [text ...]   # validate the rules file and show the rewrites for each text
+"""
+
+import json
+import os
+import re
+import sys
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rewrite_rules.json')
+
+
+def _trie_pattern(phrases):
+    """
+    Regex for a set of phrases, factored into a prefix trie so each position is checked one character at a time
+    rather than once per phrase; words are separated by any run of whitespace
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for token in phrase.replace(' ', '\0'):
+            node = node.setdefault(token, {})
+        node[''] = {}  # End of a phrase
+
+    def build(node):
+        end = '' in node
+        branches = [
+            (r'\s+' if token == '\0' else re.escape(token)) + build(child)
+            for token, child in sorted(node.items()) if token
+        ]
+        if not branches:
+            return ''
+        if not end:
+            return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy optional: a longer phrase is tried before the shorter one ending here
+        return f"(?:{'|'.join(branches)})?"
+
+    return build(trie)
+
+
+def match_case(original, replacement):
+    """Carry the capitalization of the matched text over to its replacement"""
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class RewriteRules:
+    """
+    Phrase rewrites compiled into a single case-insensitive trie-shaped regex
+    Phrases match on word boundaries; where phrases overlap, the longest one starting first wins
+    """
+
+    def __init__(self, rules):
+        self.rules = {}  # lowercased phrase -> (replacement, reason)
+        for rule in rules:
+            phrase = ' '.join(rule['match'].split()).lower()
+            if not phrase:
+                raise ValueError("Rewrite rule with an empty match")
+            if phrase in self.rules:
+                raise ValueError(f"Duplicate rewrite rule: {phrase!r}")
+            self.rules[phrase] = (rule['replace'], rule.get('reason', 'Softened harsh language'))
+
+        self._pattern = re.compile(rf'\b{_trie_pattern(self.rules)}\b', re.IGNORECASE) if self.rules else None
+
+    @classmethod
+    def load(cls, path=DEFAULT_RULES_PATH):
+        """Load rules from a JSON file of the form {"rules": [{"match", "replace", "reason"}]}"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['rules'])
+
+    def apply(self, text):
+        """
+        Rewrite every matching phrase in text
+        Returns (new text, rewrites); each rewrite gives its span in the original text and in the new text
+        """
+        if self._pattern is None:
+            return text, []
+        parts = []
+        rewrites = []
+        position = 0
+        shift = 0
+        for match in self._pattern.finditer(text):
+            original = match.group()
+            replacement, reason = self.rules[' '.join(original.split()).lower()]
+            replacement = match_case(original, replacement)
+            parts.append(text[position:match.start()])
+            parts.append(replacement)
+            rewrites.append({
+                'start': match.start(),
+                'end': match.end(),
+                'improved_start': match.start() + shift,
+                'improved_end': match.start() + shift + len(replacement),
+                'original': original,
+                'replacement': replacement,
+                'reason': reason
+            })
+            shift += len(replacement) - len(original)
+            position = match.end()
+        parts.append(text[position:])
+        return ''.join(parts), rewrites
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def main():
+    """Validate a rules file and print the rewrites it makes to each text given"""
+    args = sys.argv[1:]
+    path = args.pop(0) if args and args[0].endswith('.json') else DEFAULT_RULES_PATH
+    try:
+        rules = RewriteRules.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {path}: {e}")
+        sys.exit(1)
+    print(f"✅ {len(rules)} rewrite rules in {path}")
+
+    for text in args:
+        improved, rewrites = rules.apply(text)
+        print(f"\n{text}\n→ {improved}")
+        for rewrite in rewrites:
+            print(f"  [{rewrite['start']}:{rewrite['end']}] {rewrite['original']!r} → {rewrite['replacement']!r} ({rewrite['reason']})")
+
+
+if __name__ == '__main__':
+    main()
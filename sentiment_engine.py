@@ -0,0 +1,153 @@
+"""
+Sentiment Analysis Tool - Compiled Lexicon Scoring Engine
+Scores text against the TextBlob/Pattern sentiment lexicon without building a TextBlob per call
+"""
+
+import os
+import threading
+
+from textblob import TextBlob
+from textblob._text import EMOTICONS, PUNCTUATION
+from textblob.en import sentiment as pattern_sentiment
+
+# Words that flip the polarity of the next known word ("not good")
+NEGATIONS = frozenset(pattern_sentiment.negations)
+
+# Part-of-speech tags that make a word an intensifier ("very", "really")
+MODIFIER_TAGS = tuple(pattern_sentiment.modifiers)
+
+_lexicon = None
+_emoticons = None
+_lock = threading.Lock()
+
+
+def load_lexicon():
+    """
+    Load the Pattern lexicon once into flat lookup tables
+    Returns ({word: (polarity, subjectivity, intensity, is_modifier)}, {emoticon: polarity})
+    """
+    global _lexicon, _emoticons
+    if _lexicon is not None:
+        return _lexicon, _emoticons
+
+    with _lock:
+        if _lexicon is None:
+            if dict.__len__(pattern_sentiment) == 0:
+                pattern_sentiment.load()
+
+            lexicon = {}
+            for word, tags in dict.items(pattern_sentiment):
+                polarity, subjectivity, intensity = tags[None]
+                is_modifier = any(tag in tags for tag in MODIFIER_TAGS)
+                lexicon[word] = (polarity, subjectivity, intensity, is_modifier)
+
+            # First group wins, matching Pattern's scan order
+            emoticons = {}
+            for (_mood, polarity), faces in EMOTICONS.items():
+                for face in faces:
+                    emoticons.setdefault(face.lower(), polarity)
+
+            _emoticons = emoticons
+            _lexicon = lexicon
+    return _lexicon, _emoticons
+
+
+def tokenize(text):
+    """Split text into lowercase tokens using Pattern's tokenizer"""
+    return [word.lower() for word in " ".join(pattern_sentiment.tokenizer(text)).split()]
+
+
+def assess(tokens):
+    """
+    Score a token list the same way Pattern's Sentiment.assessments does
+    Returns a list of [polarity, subjectivity, intensity, negated] entries
+    """
+    lexicon, emoticons = load_lexicon()
+    assessments = []
+    modifier = None  # Preceding intensifier ("very good")
+    negation = None  # Preceding negation ("not good")
+
+    for word in tokens:
+        entry = lexicon.get(word)
+        if entry is not None:
+            polarity, subjectivity, intensity, is_modifier = entry
+            if modifier is None:
+                assessments.append([polarity, subjectivity, intensity, False])
+            else:
+                last = assessments[-1]
+                last[0] = max(-1.0, min(polarity * last[2], 1.0))
+                last[1] = max(-1.0, min(subjectivity * last[2], 1.0))
+                last[2] = intensity
+            if negation is not None:
+                last = assessments[-1]
+                last[2] = 1.0 / last[2]
+                last[3] = True
+            modifier = word if is_modifier else None
+            negation = word if word in NEGATIONS else None
+        else:
+            if word in NEGATIONS:
+                negation = word
+            # Negation carries across small words ("not a good")
+            elif negation and len(word.strip("'")) > 1:
+                negation = None
+            # Negation after an adverb ("really not good")
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                assessments[-1][3] = True
+                negation = None
+            # Intensifier carries across small words ("really is a good")
+            elif modifier and len(word) > 2:
+                modifier = None
+            # Exclamation marks boost the previous word
+            if word == "!" and assessments:
+                last = assessments[-1]
+                last[0] = max(-1.0, min(last[0] * 1.25, 1.0))
+            # Exclamation marks in parentheses indicate sarcasm
+            if word == "(!)":
+                assessments.append([0.0, 1.0, 1.0, False])
+            if word.isalpha() is False and len(word) <= 5 and word not in PUNCTUATION:
+                polarity = emoticons.get(word)
+                if polarity is not None:
+                    assessments.append([polarity, 1.0, 1.0, False])
+
+    return assessments
+
+
+def summarize(assessments):
+    """Average a list of assessments into (polarity, subjectivity)"""
+    if not assessments:
+        return 0.0, 0.0
+
+    polarity_total = 0
+    subjectivity_total = 0
+    for polarity, subjectivity, _intensity, negated in assessments:
+        # "not good" = slightly bad, "not bad" = slightly good
+        polarity_total += polarity * -0.5 if negated else polarity
+        subjectivity_total += subjectivity
+    count = float(len(assessments))
+    return polarity_total / count, subjectivity_total / count
+
+
+def lexicon_scores(text):
+    """Return (polarity, subjectivity) for text using the compiled lexicon"""
+    return summarize(assess(tokenize(text)))
+
+
+def textblob_scores(text):
+    """Return (polarity, subjectivity) for text using TextBlob (reference backend)"""
+    sentiment = TextBlob(text).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+
+BACKENDS = {
+    'lexicon': lexicon_scores,
+    'textblob': textblob_scores,
+}
+
+
+def get_scorer(name=None):
+    """Return the scoring function for a backend name (defaults to SENTIMENT_BACKEND or 'lexicon')"""
+    name = name or os.environ.get('SENTIMENT_BACKEND', 'lexicon')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend: {name}")
+    return BACKENDS[name]
+
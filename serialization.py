@@ -0,0 +1,120 @@
+"""
+Sentiment Analysis Tool - API Serialization
+Content negotiation between JSON (orjson when installed) and MessagePack, plus a columnar layout for batch results
+"""
+
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional; MessagePack is then not offered
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Fields of an analysis result, in column order
+ANALYSIS_FIELDS = ('polarity', 'subjectivity', 'sentiment', 'confidence', 'confidence_level', 'word_count', 'char_count')
+
+
+def _finite(obj):
+    """Copy of obj with non-finite floats replaced by None, as orjson writes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _stdlib_dumps(obj):
+    """Compact stdlib JSON with NaN and infinities written as null, so it matches orjson"""
+    try:
+        return json.dumps(obj, separators=(',', ':'), allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(obj), separators=(',', ':'))
+
+
+def dumps(obj):
+    """
+    Encode obj as compact JSON text
+    Values orjson rejects (integers beyond 64 bits) go through the stdlib encoder, so client-supplied values always encode
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            pass
+    return _stdlib_dumps(obj)
+
+
+def available_mimetypes():
+    """Response types this server can produce, preferred first"""
+    if msgpack is None:
+        return (JSON_MIMETYPE,)
+    return (JSON_MIMETYPE,) + MSGPACK_MIMETYPES
+
+
+def choose_format(accept_mimetypes, override=None):
+    """
+    Pick 'json' or 'msgpack' from a ?format= override or the Accept header
+    An Accept header matching neither gets JSON, as before negotiation existed; an unavailable override returns None
+    """
+    if override:
+        if override == 'msgpack' and msgpack is not None or override == 'json':
+            return override
+        return None
+    if not accept_mimetypes:
+        return 'json'
+    best = accept_mimetypes.best_match(available_mimetypes())
+    return 'msgpack' if best in MSGPACK_MIMETYPES else 'json'
+
+
+def encode(payload, fmt):
+    """Return (body bytes, mimetype) for payload in the chosen format"""
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_MIMETYPES[0]
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload), JSON_MIMETYPE
+        except TypeError:
+            pass
+    return _stdlib_dumps(payload).encode('utf-8'), JSON_MIMETYPE
+
+
+def decode_msgpack(body):
+    """Decode a MessagePack request body, or return None if it is not valid"""
+    if msgpack is None:
+        return None
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException):
+        return None
+
+
+def to_columnar(results, fields=None):
+    """
+    Convert batch results ([{'index', 'data'|'error'}]) to one array per field (ANALYSIS_FIELDS unless given)
+    The shared timestamp is sent once and failed items are listed separately
+    """
+    ok = [result for result in results if 'data' in result]
+    failed = [result for result in results if 'error' in result]
+    columns = {'index': [result['index'] for result in ok]}
+    for field in fields or ANALYSIS_FIELDS:
+        if field != 'timestamp':
+            columns[field] = [result['data'][field] for result in ok]
+    return {
+        'timestamp': ok[0]['data'].get('timestamp') if ok else None,
+        'columns': columns,
+        'failed': {
+            'index': [result['index'] for result in failed],
+            'error': [result['error'] for result in failed]
+        }
+    }
@@ -0,0 +1,184 @@
+"""
+Sentiment Analysis Tool - Single-Flight Call Coalescing
+Concurrent callers asking for the same key share one in-flight call and its result
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+from metrics import registry as metrics
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; cross-worker coalescing is then disabled
+    fcntl = None
+
+# How often a worker waiting on another worker's call checks whether it has finished
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """One in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs fn once per key at a time within a process
+    With lock_dir set, the running call also holds a per-key file lock so other worker processes wait for it too,
+    for at most lock_timeout seconds before making the call themselves
+    """
+
+    def __init__(self, lock_dir=None, lock_timeout=30.0):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_timeout = lock_timeout
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._calls = {}
+        self._async_calls = {}  # key -> asyncio.Future, for callers on the event loop
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(('calls', 'executions', 'coalesced', 'coalesced_across_workers'), 0)
+
+    def do(self, key, fn, recheck=None):
+        """
+        Return fn(), sharing one execution between concurrent callers with the same key
+        recheck() is called after waiting for another worker; a non-None value is returned instead of calling fn
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._count('coalesced')
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, recheck)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _count(self, outcome):
+        """Count a call by outcome, here and in the Prometheus metrics (lock held)"""
+        self._stats[outcome] += 1
+        metrics.inc('sentiment_singleflight_calls_total', outcome=outcome)
+
+    def _lock_path(self, key):
+        """One lock file per key, so unrelated keys never wait on each other"""
+        return os.path.join(self.lock_dir, hashlib.sha256(str(key).encode('utf-8')).hexdigest() + '.lock')
+
+    def _acquire(self, path):
+        """
+        Lock path, polling until lock_timeout
+        Returns (open lock file or None on timeout, whether another worker held it first)
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        waited = False
+        while True:
+            lock_file = open(path, 'a')
+            try:
+                while True:
+                    try:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        waited = True
+                        if time.monotonic() >= deadline:
+                            lock_file.close()
+                            return None, waited
+                        time.sleep(LOCK_POLL_INTERVAL)
+                # The previous holder removes the file when it is done; lock a fresh one if that happened
+                if os.path.exists(path) and os.path.samestat(os.fstat(lock_file.fileno()), os.stat(path)):
+                    return lock_file, waited
+            except OSError:
+                pass
+            lock_file.close()
+
+    def _run(self, key, fn, recheck):
+        if not self.lock_dir:
+            return self._execute(fn)
+
+        path = self._lock_path(key)
+        lock_file, waited = self._acquire(path)
+        if waited and recheck:
+            # Another worker made this call: pick up its result if it stored one
+            result = recheck()
+            if result is not None:
+                with self._lock:
+                    self._count('coalesced_across_workers')
+                if lock_file is not None:
+                    self._release(path, lock_file)
+                return result
+        if lock_file is None:
+            return self._execute(fn)  # Still held after lock_timeout: make the call rather than wait longer
+        try:
+            return self._execute(fn)
+        finally:
+            self._release(path, lock_file)
+
+    @staticmethod
+    def _release(path, lock_file):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+
+    def _execute(self, fn):
+        with self._lock:
+            self._count('executions')
+        return fn()
+
+    async def ado(self, key, fn):
+        """
+        Event-loop version of do: await fn() once per key at a time among coroutines on the same loop
+        Cross-worker lock files are not used here, since waiting on them would block the loop
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._async_calls.get(key)
+            self._count('coalesced' if call is not None else 'executions')
+        if call is not None:
+            return await asyncio.shield(call)
+
+        call = self._async_calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+            call.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            call.exception()  # Mark retrieved so a call nobody else waited on is not logged
+            raise
+        finally:
+            del self._async_calls[key]
+
+    def stats(self):
+        """Return call, execution and coalescing counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls) + len(self._async_calls)
+        return stats
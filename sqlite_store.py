@@ -0,0 +1,47 @@
+"""
+Sentiment Analysis Tool - Shared SQLite Files
+Per-thread connections to the local SQLite files every worker on the host shares (improvement cache, review state,
+live sessions, rate limits)
+"""
+
+import os
+import sqlite3
+import threading
+
+# Seconds a connection waits for another worker's write lock before raising
+BUSY_TIMEOUT = 5
+
+
+class SQLiteFile:
+    """
+    A SQLite file in WAL mode with one connection per thread, opened on first use
+    Connections are never opened at import or carried across a fork: the app may be imported in a gunicorn master,
+    and a connection inherited by forked workers corrupts the file. The schema is created with a connection that is
+    closed right away
+    """
+
+    def __init__(self, path, schema=(), autocommit=False, synchronous='NORMAL'):
+        self.path = path
+        self.autocommit = autocommit  # No implicit transactions, so callers can BEGIN IMMEDIATE themselves
+        self.synchronous = synchronous
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if schema:
+            conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+            try:
+                with conn:
+                    for statement in schema:
+                        conn.execute(statement)
+            finally:
+                conn.close()
+
+    def connection(self):
+        """Return this thread's connection (SQLite connections cannot be shared across threads or processes)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None if self.autocommit else '')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Stub LLM Server
+Local stand-in for the chat-completions endpoint with simulated latency, errors and hangs, for load testing
+
+Usage:
+    python stub_llm.py --port 8089 --latency 0.8 --jitter 0.3 --error-rate 0.05
+    UPSTREAM_URL=http://127.0.0.1:8089/v1/chat/completions DEEPSEEK_API_KEY=stub gunicorn --config gunicorn.conf.py main:app
+
+Replies soften the quoted text of the last user message with the fallback rewrite rules, so reviews look realistic.
+GET /stats returns the number of requests served by outcome.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rewrite_rules import RewriteRules
+
+# The prompt quotes the text to improve
+_QUOTED = re.compile(r'"(.*)"', re.DOTALL)
+
+
+class StubBehaviour:
+    """Latency and failure settings, and counters of what was served"""
+
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, error_statuses=(500, 503, 429),
+                 hang_rate=0.0, hang=30.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.rules = RewriteRules.load()
+        self.served = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def plan(self):
+        """Decide one request's outcome: (delay seconds, error status or None)"""
+        with self._lock:
+            roll = self._random.random()
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            status = self._random.choice(self.error_statuses) if roll < self.error_rate else None
+            hung = not status and roll < self.error_rate + self.hang_rate
+        return (self.hang if hung else delay), status, hung
+
+    def count(self, outcome):
+        with self._lock:
+            self.served[outcome] += 1
+
+
+def completion(text, model):
+    """Build a chat-completions response body"""
+    return {
+        'id': f'chatcmpl-{uuid.uuid4().hex}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': text},
+            'finish_reason': 'stop'
+        }],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    }
+
+
+def make_handler(behaviour):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            if status == 429:
+                self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self.send_json(200, dict(behaviour.served))
+            else:
+                self.send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                content = payload['messages'][-1]['content']
+            except (ValueError, KeyError, IndexError, TypeError):
+                behaviour.count('bad_request')
+                self.send_json(400, {'error': {'message': 'Invalid chat-completions request'}})
+                return
+
+            delay, status, hung = behaviour.plan()
+            time.sleep(delay)
+            if hung:
+                behaviour.count('hung')
+                self.send_json(504, {'error': {'message': 'Stub hang elapsed'}})
+            elif status:
+                behaviour.count(f'error_{status}')
+                self.send_json(status, {'error': {'message': f'Simulated {status}'}})
+            else:
+                match = _QUOTED.search(content)
+                improved, _rewrites = behaviour.rules.apply(match.group(1) if match else content)
+                behaviour.count('ok')
+                self.send_json(200, completion(improved, payload.get('model', 'stub')))
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet under load
+
+    return StubHandler
+
+
+def serve(host='127.0.0.1', port=8089, behaviour=None):
+    """Create the stub server (call serve_forever() on it, or run it in a thread)"""
+    server = ThreadingHTTPServer((host, port), make_handler(behaviour or StubBehaviour()))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub chat-completions server for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean response time in seconds (default: 0.5)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='standard deviation of the response time (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail (default: 0)')
+    parser.add_argument('--error-statuses', default='500,503,429', help='statuses failures are drawn from (default: 500,503,429)')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fraction of requests that hang (default: 0)')
+    parser.add_argument('--hang', type=float, default=30.0, help='seconds a hung request takes (default: 30)')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible runs')
+    args = parser.parse_args()
+
+    behaviour = StubBehaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(status) for status in args.error_statuses.split(',')),
+        hang_rate=args.hang_rate,
+        hang=args.hang,
+        seed=args.seed
+    )
+    server = serve(args.host, args.port, behaviour)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {dict(behaviour.served)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Test setup: every file the app writes goes to a temporary directory, and the AI upstream is never called
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set before main is imported, since it reads its configuration at import
+_data_dir = tempfile.mkdtemp(prefix='sentiment-tests-')
+os.environ.update({
+    'HISTORY_STORE': 'sql',
+    'HISTORY_DATABASE_URL': f"sqlite:///{os.path.join(_data_dir, 'history.db')}",
+    'REVIEW_STATE_PATH': os.path.join(_data_dir, 'review_state.db'),
+    'IMPROVEMENT_CACHE_PATH': os.path.join(_data_dir, 'improvement_cache.db'),
+    'LIVE_SESSION_PATH': os.path.join(_data_dir, 'live_sessions.db'),
+    'WARM_STARTUP': 'off',
+})
+os.environ.pop('METRICS_DIR', None)
+os.environ.pop('DEEPSEEK_API_KEY', None)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--parity-samples', action='append', default=[], metavar='PATH',
+                     help='Newline-separated texts to add to the engine parity check')
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize parity tests over the built-in samples plus any --parity-samples files"""
+    if 'parity_text' in metafunc.fixturenames:
+        texts = list(metafunc.module.PARITY_SAMPLES)
+        for path in metafunc.config.getoption('parity_samples'):
+            with open(path, encoding='utf-8') as f:
+                texts.extend(line.rstrip('\n') for line in f if line.strip())
+        metafunc.parametrize('parity_text', texts)
+
+
+@pytest.fixture
+def client():
+    from main import app
+    app.config['TESTING'] = True
+    return app.test_client()
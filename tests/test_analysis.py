@@ -0,0 +1,49 @@
+"""
+Batch and streamed scoring must return what scoring each text on its own returns
+"""
+
+from analysis import analyze_sentiment, analyze_sentiment_batch, analysis_cache
+from long_document import split_sentences
+
+TEXTS = [
+    "I love this product!",
+    "This is really not good.",
+    "Extremely awful, really terrible service!!",
+    "What a wonderful day :) but a sad ending :(",
+    "The weather is cloudy today.",
+    "I love this product!",
+]
+
+
+def without_timestamp(analysis):
+    return {field: value for field, value in analysis.items() if field != 'timestamp'}
+
+
+def test_batch_matches_single_scoring():
+    expected = [without_timestamp(analyze_sentiment(text)) for text in TEXTS]
+    analysis_cache.clear()
+    results = analyze_sentiment_batch(TEXTS)
+    assert [result['index'] for result in results] == list(range(len(TEXTS)))
+    assert [without_timestamp(result['data']) for result in results] == expected
+
+
+def test_batch_reports_invalid_items_in_place():
+    results = analyze_sentiment_batch(["Good.", "", 5, "x" * 5001, "Bad."])
+    assert 'data' in results[0] and 'data' in results[4]
+    assert [results[i]['error'] for i in (1, 2, 3)] == [
+        'Empty text provided', 'Text must be a string', 'Text too long (max 5000 characters)'
+    ]
+
+
+def test_batch_fields():
+    results = analyze_sentiment_batch(["Very good!"], fields=('sentiment', 'word_count'))
+    assert results[0]['data'] == {'sentiment': 'Positive', 'word_count': 2}
+
+
+def test_sentences_do_not_depend_on_chunking():
+    text = 'good ' * 1500 + 'bad. Next sentence is fine.\n\nShort one! ' + 'x' * 6000 + ' end.'
+    whole = list(split_sentences([text]))
+    assert [len(sentence) for _start, sentence in whole] == [4999, 2504, 22, 10, 5000, 1005]
+    for size in (7, 1000, 4096):
+        assert list(split_sentences([text[i:i + size] for i in range(0, len(text), size)])) == whole
+    assert all(text[start:start + len(sentence)] == sentence for start, sentence in whole)
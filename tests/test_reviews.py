@@ -0,0 +1,65 @@
+"""
+Review flow through the web routes: a review belongs to exactly one comment, even after the history is cleared
+"""
+
+import time
+
+import pytest
+
+
+def add_comment(client, text):
+    """Analyze text through the form and return the new comment from the session's history"""
+    import main
+
+    client.post('/analyze', data={'text': text})
+    with client.session_transaction() as session:
+        history_id = session['history_id']
+    with main.app.app_context():
+        return main.history_store.recent(history_id, 1)[0]
+
+
+def review(client, comment_id, timeout=10):
+    """Start a review and poll until it is done"""
+    client.get(f'/review/{comment_id}')
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f'/api/review/{comment_id}').get_json()
+        if status['status'] == 'done':
+            return status['data']
+        if time.monotonic() > deadline:
+            pytest.fail(f"Review of comment {comment_id} did not finish: {status}")
+        time.sleep(0.05)
+
+
+def test_review_is_for_its_own_comment(client):
+    comment = add_comment(client, "This is terrible and awful, I hate it")
+    data = review(client, comment['id'])
+    assert data['improvement']['improved_text'] != comment['text']
+    assert data['improved_analysis']['polarity'] > comment['polarity']
+
+
+def test_cleared_comment_ids_do_not_inherit_reviews(client):
+    first = add_comment(client, "This is terrible and awful, I hate it")
+    first_review = review(client, first['id'])
+
+    client.post('/clear_history')
+    second = add_comment(client, "The stupid useless app is horrible")
+    assert second['id'] != first['id']
+
+    second_review = review(client, second['id'])
+    assert second_review != first_review
+    assert 'app' in second_review['improvement']['improved_text']
+
+
+def test_clear_history_forgets_reviews(client):
+    import main
+
+    comment = add_comment(client, "This is terrible and awful, I hate it")
+    review(client, comment['id'])
+    with client.session_transaction() as session:
+        history_id = session['history_id']
+    assert main.review_state.status((history_id, comment['id']))['status'] == 'done'
+
+    client.post('/clear_history')
+    assert main.review_state.status((history_id, comment['id']))['status'] == 'missing'
+    assert main.review_jobs.status((history_id, comment['id']))['status'] == 'missing'
@@ -0,0 +1,48 @@
+"""
+The compiled lexicon engine must score exactly like TextBlob; it reads Pattern's lexicon through TextBlob internals,
+so run these after any TextBlob upgrade (add your own texts with --parity-samples samples.txt)
+"""
+
+import pytest
+
+from sentiment_engine import get_scorer, lexicon_scores, textblob_scores
+
+# Sentences exercising negation, intensifiers, exclamations, emoticons and contractions
+PARITY_SAMPLES = [
+    "I love this product!",
+    "This is terrible.",
+    "The weather is cloudy today.",
+    "This is not good.",
+    "This is not bad at all.",
+    "It was not a good experience.",
+    "This is very good.",
+    "This is really not good.",
+    "Extremely awful, really terrible service!!",
+    "I don't like it, it's not very helpful.",
+    "Never again. Never buying this.",
+    "What a wonderful day :) but a sad ending :(",
+    "Great (!) another meeting.",
+    "The food was good but the service was slow and the staff were rude.",
+    "Absolutely fantastic! Highly recommended! 10/10 :D",
+    "I'm so happy <3",
+    "It's okay, I guess. Not the best, not the worst.",
+    "U.S. customers were incredibly disappointed... honestly.",
+    "\"Amazing\" she said, 'truly amazing'.",
+    "This is stupid and useless, I hate it.",
+    "Somewhat interesting, fairly boring overall.",
+    "no",
+    "",
+    "!!!",
+    "The product is blue.\n\nIt arrived on Tuesday.",
+]
+
+
+def test_lexicon_matches_textblob(parity_text):
+    assert lexicon_scores(parity_text) == pytest.approx(textblob_scores(parity_text), abs=1e-9)
+
+
+def test_get_scorer():
+    assert get_scorer('lexicon') is lexicon_scores
+    assert get_scorer('textblob') is textblob_scores
+    with pytest.raises(ValueError):
+        get_scorer('missing')
@@ -0,0 +1,266 @@
+"""
+Sentiment Analysis Tool - Upstream LLM Client
+Keep-alive connection pool with bounded concurrency, jittered retries and a circuit breaker
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # Only needed for async serving (apost_json)
+    httpx = None
+
+DEFAULT_UPSTREAM_URL = 'https://openrouter.ai/api/v1/chat/completions'
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+class UpstreamError(Exception):
+    """The upstream call failed; callers should fall back"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The circuit breaker is open, so the upstream was not called"""
+
+
+class UpstreamBusyError(UpstreamError):
+    """Too many upstream calls are already in flight"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through once the cooldown has passed"""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may go to the upstream now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """
+    Reusable JSON-over-HTTP client for the chat-completions endpoint
+    post_json blocks the calling thread; apost_json is the event-loop version, sharing the breaker and counters
+    """
+
+    def __init__(self, url=DEFAULT_UPSTREAM_URL, timeout=10.0, connect_timeout=3.0, retries=2,
+                 backoff=0.25, max_concurrency=8, acquire_timeout=0.5,
+                 breaker_threshold=5, breaker_cooldown=30.0, async_max_concurrency=256):
+        self.url = url
+        self.timeout = (connect_timeout, timeout)
+        self.async_max_concurrency = async_max_concurrency
+        self._async_client = None  # (event loop, httpx.AsyncClient, semaphore), created on first async call
+        self.retries = retries
+        self.backoff = backoff
+        self.acquire_timeout = acquire_timeout
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = dict.fromkeys(('calls', 'successes', 'failures', 'retries', 'short_circuits', 'rejected'), 0)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_env(cls):
+        """Build a client from UPSTREAM_* environment variables"""
+        return cls(
+            url=os.environ.get('UPSTREAM_URL', DEFAULT_UPSTREAM_URL),
+            timeout=float(os.environ.get('UPSTREAM_TIMEOUT', 10)),
+            connect_timeout=float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3)),
+            retries=int(os.environ.get('UPSTREAM_RETRIES', 2)),
+            max_concurrency=int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', 8)),
+            breaker_threshold=int(os.environ.get('UPSTREAM_BREAKER_THRESHOLD', 5)),
+            breaker_cooldown=float(os.environ.get('UPSTREAM_BREAKER_COOLDOWN', 30)),
+            async_max_concurrency=int(os.environ.get('UPSTREAM_ASYNC_MAX_CONCURRENCY', 256))
+        )
+
+    def max_call_duration(self):
+        """Longest a call can take to give up: the slot wait, every attempt timing out and the longest backoffs"""
+        connect_timeout, timeout = self.timeout
+        return (self.acquire_timeout + (self.retries + 1) * (connect_timeout + timeout)
+                + self.backoff * (2 ** self.retries - 1))
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def post_json(self, payload, headers=None):
+        """
+        POST payload and return the decoded JSON response
+        Raises UpstreamError (or a subclass) when the call cannot be completed
+        """
+        self._count('calls')
+        if self.breaker.state == 'open':
+            self._count('short_circuits')
+            raise CircuitOpenError('Upstream circuit is open')
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count('rejected')
+            raise UpstreamBusyError('Too many upstream calls in flight')
+
+        try:
+            # Re-check under the breaker lock: only one trial call goes through while half-open
+            if not self.breaker.allow():
+                self._count('short_circuits')
+                raise CircuitOpenError('Upstream circuit is open')
+            return self._post_with_retries(payload, headers)
+        finally:
+            self._slots.release()
+
+    def _post_with_retries(self, payload, headers):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retries')
+                # Full jitter: sleep a random fraction of the exponential backoff
+                time.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+            try:
+                response = self.session.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = UpstreamError(f'Upstream request failed: {e}')
+                continue
+
+            result, last_error = self._check_response(response)
+            if last_error is None:
+                return result
+        return self._give_up(last_error)
+
+    def _check_response(self, response):
+        """
+        Return (decoded JSON, None) for a good response or (None, error) for a retryable failure
+        Raises right away for errors that retries will not fix
+        """
+        if response.status_code == 200:
+            try:
+                result = response.json()
+            except ValueError:
+                return None, UpstreamError('Upstream returned invalid JSON')
+            self.breaker.record_success()
+            self._count('successes')
+            return result, None
+
+        error = UpstreamError(f'Upstream error: {response.status_code} - {response.text[:200]}')
+        if response.status_code not in RETRYABLE_STATUS:
+            # Client errors (bad key, bad request) will not improve with retries
+            self.breaker.record_success()
+            self._count('failures')
+            raise error
+        return None, error
+
+    def _give_up(self, last_error):
+        logging.warning(f"Upstream call failed after {self.retries + 1} attempts: {last_error}")
+        self.breaker.record_failure()
+        self._count('failures')
+        raise last_error
+
+    def _async_state(self):
+        """The AsyncClient and concurrency semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client[0] is not loop:
+            if httpx is None:
+                raise UpstreamError('httpx is required for async upstream calls')
+            connect_timeout, read_timeout = self.timeout
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.async_max_concurrency)
+            )
+            self._async_client = (loop, client, asyncio.Semaphore(self.async_max_concurrency))
+        return self._async_client[1:]
+
+    async def apost_json(self, payload, headers=None):
+        """
+        Event-loop version of post_json: waits on the network without holding a thread
+        Up to async_max_concurrency calls run at once; the rest wait up to acquire_timeout for a slot
+        """
+        self._count('calls')
+        if self.breaker.state == 'open':
+            self._count('short_circuits')
+            raise CircuitOpenError('Upstream circuit is open')
+
+        client, slots = self._async_state()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._count('rejected')
+            raise UpstreamBusyError('Too many upstream calls in flight')
+
+        try:
+            if not self.breaker.allow():
+                self._count('short_circuits')
+                raise CircuitOpenError('Upstream circuit is open')
+            last_error = None
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self._count('retries')
+                    await asyncio.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+                try:
+                    response = await client.post(self.url, json=payload, headers=headers)
+                except httpx.HTTPError as e:
+                    last_error = UpstreamError(f'Upstream request failed: {e}')
+                    continue
+
+                result, last_error = self._check_response(response)
+                if last_error is None:
+                    return result
+            return self._give_up(last_error)
+        finally:
+            slots.release()
+
+    async def aclose(self):
+        """Close the async connection pool"""
+        if self._async_client is not None:
+            _loop, client, _slots = self._async_client
+            self._async_client = None
+            await client.aclose()
+
+    def stats(self):
+        """Return call counters and the circuit breaker state"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['circuit'] = self.breaker.state
+        return stats
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Sentiment Analysis Tool - Warm Startup
+Loads the lexicon, scoring tables and templates before serving, and benchmarks startup time
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import logging
+
+from analysis import score_sentiment
+from sentiment_engine import load_lexicon
+
+# Exercises the tokenizer's regexes, negation, modifiers and emoticons
+WARMUP_TEXT = "This is not a very good day :( but the team was really helpful!"
+
+WARMUP_MODES = ('preload', 'background', 'off')
+
+
+class WarmUp:
+    """Tracks the warm-up phase so /health can report readiness"""
+
+    def __init__(self):
+        self.state = 'cold'
+        self.timings = {}
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state in ('ready', 'off')
+
+    def _stage(self, name, fn):
+        start = time.perf_counter()
+        fn()
+        self.timings[name] = round(time.perf_counter() - start, 4)
+
+    def run(self, app):
+        """Load everything a first request would otherwise load lazily"""
+        self.state = 'warming'
+        try:
+            self._stage('lexicon', load_lexicon)
+            self._stage('scoring', lambda: score_sentiment(WARMUP_TEXT))
+            self._stage('templates', lambda: [app.jinja_env.get_template(name) for name in app.jinja_env.list_templates()])
+            self.timings['total'] = round(sum(self.timings.values()), 4)
+            self.state = 'ready'
+            logging.info(f"Warm-up finished in {self.timings['total']}s")
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            logging.error(f"Warm-up failed: {e}")
+        finally:
+            self._done.set()
+
+    def start(self, app, mode=None):
+        """
+        Warm up according to mode ('preload' by default, from WARM_STARTUP)
+        preload: load now, so a gunicorn master started with preload_app shares the tables with every worker
+        background: load in a thread while the server starts; /health reports 503 until it finishes
+        off: load lazily on first use
+        """
+        mode = mode or os.environ.get('WARM_STARTUP', 'preload')
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown warm-up mode: {mode}")
+        if mode == 'off':
+            self.state = 'off'
+            self._done.set()
+        elif mode == 'background':
+            threading.Thread(target=self.run, args=(app,), name='warmup', daemon=True).start()
+        else:
+            self.run(app)
+
+    def wait(self, timeout=None):
+        """Wait for warm-up to finish; returns True if it is ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+
+def freeze():
+    """
+    Move everything allocated so far into the permanent GC generation
+    Call in the gunicorn master right before forking so collections in workers never touch (and copy) the shared pages
+    """
+    gc.collect()
+    gc.freeze()
+
+
+# Measured in a fresh interpreter: import, warm-up and the first scoring request
+BENCHMARK_SCRIPT = """
+import json, os, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+client = main.app.test_client()
+response = client.post('/api/analyze', json={'text': 'The first request after a deploy should be fast'})
+first = time.perf_counter()
+response = client.post('/api/analyze', json={'text': 'The second request is always warm'})
+second = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'first_request_seconds': first - imported,
+    'second_request_seconds': second - first,
+    'warmup': main.startup.timings
+}))
+"""
+
+
+def run_benchmark(mode, runs):
+    """Start the app in fresh interpreters with the given warm-up mode and return each run's timings"""
+    results = []
+    env = dict(os.environ, WARM_STARTUP=mode, HISTORY_STORE='memory', IMPROVEMENT_CACHE_SIZE='0')
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', BENCHMARK_SCRIPT],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    """Benchmark cold (lazy) and warm startup"""
+    parser = argparse.ArgumentParser(description='Benchmark application startup with and without warm-up')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per mode (default: 3)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    report = {}
+    for mode in ('off', 'preload'):
+        runs = run_benchmark(mode, args.runs)
+        report[mode] = {
+            key: min(run[key] for run in runs)
+            for key in ('import_seconds', 'first_request_seconds', 'second_request_seconds')
+        }
+        report[mode]['warmup'] = runs[-1]['warmup']
+
+    print(f"{'mode':<10}{'import':>12}{'1st request':>14}{'2nd request':>14}")
+    for mode, timings in report.items():
+        print(f"{mode:<10}{timings['import_seconds'] * 1000:>10.1f}ms"
+              f"{timings['first_request_seconds'] * 1000:>12.1f}ms"
+              f"{timings['second_request_seconds'] * 1000:>12.1f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()